@@ -0,0 +1,92 @@
+import numpy
+
+import life_engine
+
+
+class ActiveEngine(life_engine.ArrayEngine):
+    # only cells next to last generation's changes are looked at, so settled boards cost almost nothing
+    def __init__(self, cells, wrapping=True):
+        self.wrapping = wrapping
+        self.generation = 0
+        self.rule = None
+        self.set_cells(cells)
+        self.set_rule([3], [2, 3])
+
+    def set_rule(self, birth, survival):
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+            self.table = life_engine.rule_table(birth, survival)
+            self.wake_all()  # every cell can change under a new rule
+
+    def set_cells(self, cells):
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        self.rows, self.columns = cells.shape
+        width = self.columns + 2
+
+        # cells are kept with a one cell border so every cell has 8 neighbors at fixed offsets
+        self.padded = numpy.zeros((self.rows + 2, width), numpy.uint8)
+        self.padded[1:-1, 1:-1] = cells
+        self.flat = self.padded.reshape(-1)
+        self.cells = self.padded[1:-1, 1:-1]
+        self.offsets = numpy.array([-width - 1, -width, -width + 1, -1, 1, width - 1, width, width + 1])
+
+        # the real cell behind each padded position, -1 for the dead border when not wrapping
+        y, x = numpy.indices(self.padded.shape)
+        if self.wrapping:
+            self.real = ((y - 1) % self.rows + 1) * width + (x - 1) % self.columns + 1
+        else:
+            self.real = numpy.where((y == 0) | (y == self.rows + 1) | (x == 0) | (x == width - 1), -1, y * width + x)
+        self.real = self.real.reshape(-1)
+
+        # border positions and the cells they copy when wrapping
+        border = numpy.flatnonzero((y == 0) | (y == self.rows + 1) | (x == 0) | (x == width - 1))
+        self.border = border if self.wrapping else border[:0]
+        self.border_sources = self.real[self.border]
+        self.update_border()
+
+        self.living_cells = int(numpy.count_nonzero(cells))
+        self.wake_all()
+
+    def wake_all(self):
+        self.active = numpy.flatnonzero(numpy.pad(numpy.ones(self.cells.shape, bool), 1))
+
+    def update_border(self):
+        self.flat[self.border] = self.flat[self.border_sources]
+
+    def step(self):
+        # cells that changed and their neighbors are the only ones that can change next
+        candidates = self.real[(self.active[:, None] + numpy.append(self.offsets, 0)).reshape(-1)]
+        candidates = numpy.unique(candidates[candidates >= 0])
+
+        counts = numpy.zeros(len(candidates), numpy.uint8)
+        for offset in self.offsets:
+            counts += self.flat[candidates + offset]
+        states = self.flat[candidates]
+        new_states = self.table[states * numpy.uint8(9) + counts]
+
+        changed = new_states != states
+        self.active = candidates[changed]
+        self.births = int(numpy.count_nonzero(new_states[changed]))
+        self.deaths = len(self.active) - self.births
+
+        self.flat[self.active] = new_states[changed]
+        self.update_border()
+        self.living_cells += self.births - self.deaths
+        self.generation += 1
+
+    def flip(self, x, y):
+        # for clicking on individual cells, the cell and its neighbors are woken
+        index = (y + 1) * (self.columns + 2) + x + 1
+        self.flat[index] = 1 - self.flat[index]
+        self.living_cells += (-1, 1)[self.flat[index]]
+        self.update_border()
+        self.active = numpy.append(self.active, index)
+
+    def get_cells(self):
+        return self.cells
+
+    def changed_cells(self):
+        # the active set is exactly the cells the last step changed, in padded positions
+        width = self.columns + 2
+        return (self.active // width - 1) * self.columns + self.active % width - 1
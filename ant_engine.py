@@ -0,0 +1,204 @@
+import numpy
+
+try:
+    import numba
+except ImportError:  # without numba the ants are stepped in python, many times slower
+    numba = None
+
+MOVES = numpy.array([[1, 0], [0, 1], [-1, 0], [0, -1]], numpy.int64)  # x, y of each facing, a quarter turn clockwise on screen apart
+TURN_LETTERS = {"N": 0, "R": 90, "U": 180, "L": -90}  # turmite rule letters, no turn, right, u-turn and left
+LOG_SIZE = 4096  # steps of a lone ant kept for finding highways
+HIGHWAY_PERIODS = 3  # times a stretch of the log must repeat to be taken for a highway
+HIGHWAY_STRIDE = 1 << 14  # most periods of a highway followed at once, bounding the memory used
+
+
+def rule_angles(text):
+    # turmite rule letters like "RL" (langton's ant) or "LLRR" as the angle turned on each colour
+    try:
+        return tuple(TURN_LETTERS[letter] for letter in text.upper())
+    except KeyError:
+        raise ValueError("turmite rules are made of the letters {}".format("".join(TURN_LETTERS)))
+
+
+def run_ants(cells, xs, ys, directions, turns, colours, moves, dirty, steps, log, logged):
+    # steps every ant in turn, each turning by its rule for the colour under it, recolouring the cell and moving on
+    # a lone ant's steps go in the log as x, y, facing after turning and colour read, returns the new number logged
+    rows, columns = cells.shape
+    ants = len(xs)
+    for step in range(steps):
+        for ant in range(ants):
+            x = xs[ant]
+            y = ys[ant]
+            colour = cells[y, x]
+            direction = (directions[ant] + turns[ant, colour]) & 3
+            if ants == 1:
+                entry = logged % log.shape[0]
+                log[entry, 0] = x
+                log[entry, 1] = y
+                log[entry, 2] = direction
+                log[entry, 3] = colour
+                logged += 1
+            cells[y, x] = colours[ant, colour]
+            dirty[y, x] = 1
+            directions[ant] = direction
+            x += moves[direction, 0]
+            y += moves[direction, 1]
+            if x < 0:
+                x += columns
+            elif x >= columns:
+                x -= columns
+            if y < 0:
+                y += rows
+            elif y >= rows:
+                y -= rows
+            xs[ant] = x
+            ys[ant] = y
+    return logged
+
+
+if numba is not None:
+    run_ants = numba.njit(cache=True)(run_ants)
+
+
+class AntEngine:
+    # langton's ants and multi-colour turmites on a torus of byte cells, the colour of each cell choosing its ant's turn
+    # steps run in one compiled loop without pygame, the cells they change are gathered for the next frame,
+    # and a lone ant that settles into a highway is moved along it whole periods at a time instead of stepped
+    def __init__(self, cells):
+        self.xs = numpy.zeros(0, numpy.int64)
+        self.ys = numpy.zeros(0, numpy.int64)
+        self.directions = numpy.zeros(0, numpy.int64)  # index into MOVES
+        self.turns = numpy.zeros((0, 256), numpy.int64)  # turns[ant, colour] is quarter turns clockwise
+        self.colours = numpy.zeros((0, 256), numpy.uint8)  # colours[ant, colour] is the colour the ant leaves behind
+        self.log = numpy.zeros((LOG_SIZE, 4), numpy.int64)
+        self.highway = None  # (period, dx, dy) of the last highway followed
+        self.steps = 0
+        self.set_cells(cells)
+
+    def set_cells(self, cells):
+        self.cells = numpy.array(cells, numpy.uint8)
+        self.rows, self.columns = self.cells.shape
+        self.dirty = numpy.zeros(self.cells.shape, numpy.uint8)
+        self.reset_log()
+
+    def set_cell(self, x, y, colour):
+        # for cells changed by anything but the ants, which breaks the link with the logged steps
+        self.cells[y, x] = colour
+        self.dirty[y, x] = 1
+        self.reset_log()
+
+    def reset_log(self):
+        self.logged = 0  # steps logged since the lone ant's history last started
+        self.search_at = LOG_SIZE  # logged steps before the next look for a highway, doubled after each miss
+
+    def add_ant(self, x, y, direction, rule):
+        # rule is the angle turned on each colour, multiples of 90 clockwise, or turmite letters like "RL"
+        if isinstance(rule, str):
+            rule = rule_angles(rule)
+        if not 0 < len(rule) <= 256 or any(angle % 90 for angle in rule):
+            raise ValueError("ant rules need 1 to 256 angles, each a multiple of 90")
+        colours = numpy.arange(256)
+        self.xs = numpy.append(self.xs, x % self.columns)
+        self.ys = numpy.append(self.ys, y % self.rows)
+        self.directions = numpy.append(self.directions, direction % 4)
+        self.turns = numpy.vstack([self.turns, numpy.array(rule)[colours % len(rule)] // 90 % 4])
+        self.colours = numpy.vstack([self.colours, ((colours + 1) % len(rule)).astype(numpy.uint8)])
+        self.reset_log()
+
+    def advance(self, steps):
+        # steps every ant the given number of times, following a lone ant's highway where it can
+        while steps > 0:
+            if len(self.xs) == 1 and self.logged >= self.search_at:
+                steps -= self.follow_highway(steps)
+            run = steps if self.search_at <= self.logged or len(self.xs) != 1 else min(steps, self.search_at - self.logged)
+            self.logged = run_ants(self.cells, self.xs, self.ys, self.directions, self.turns, self.colours, MOVES,
+                                   self.dirty, run, self.log, self.logged)
+            self.steps += run
+            steps -= run
+
+    def step(self):
+        self.advance(1)
+
+    def dirty_cells(self):
+        # x and y of the cells changed since the last call, for redrawing only those
+        ys, xs = numpy.nonzero(self.dirty)
+        self.dirty[ys, xs] = 0
+        return xs, ys
+
+    def get_cells(self):
+        return self.cells
+
+    def logged_steps(self):
+        # the valid part of the log, oldest step first
+        count = min(self.logged, LOG_SIZE)
+        return numpy.roll(self.log, -(self.logged % LOG_SIZE), axis=0)[LOG_SIZE - count:]
+
+    def find_period(self, log):
+        # (period, dx, dy) the last HIGHWAY_PERIODS periods of the log repeat with, moving the ant, or None
+        dims = numpy.array([self.columns, self.rows])
+        candidates = numpy.arange(1, len(log) // HIGHWAY_PERIODS + 1)
+        for back in range(1, min(32, len(log) - len(candidates)) + 1):  # most periods are ruled out by the last few steps
+            candidates = candidates[(log[-back - candidates, 2:] == log[-back, 2:]).all(axis=1)]
+        if self.highway is not None:  # a highway that was left often carries on
+            candidates = [self.highway[0]] + list(candidates)
+        for period in candidates:
+            if period * HIGHWAY_PERIODS > len(log):
+                continue
+            recent = log[len(log) - (HIGHWAY_PERIODS - 1) * period:]
+            earlier = log[len(log) - HIGHWAY_PERIODS * period:len(log) - period]
+            moved = (recent[:, :2] - earlier[:, :2]) % dims
+            if moved[0].any() and (moved == moved[0]).all() and (recent[:, 2:] == earlier[:, 2:]).all():
+                return int(period), int(moved[0, 0]), int(moved[0, 1])
+        return None
+
+    def follow_highway(self, steps):
+        # moves a lone ant along the highway it is building by as many whole periods of steps as are exact, returning the steps
+        # cells the ant reads without having written them in the log must hold what they did a period before, all the way along
+        log = self.logged_steps()
+        highway = self.find_period(log)
+        if highway is None:
+            self.search_at = self.logged * 2
+            return 0
+        period, dx, dy = highway
+        if steps < period:
+            return 0
+
+        window = log[len(log) - HIGHWAY_PERIODS * period:]  # every period in it is the one before moved by dx, dy
+        places = window[:, 1] * self.columns + window[:, 0]
+        last = window[-period:]
+        first_visits = numpy.unique(places, return_index=True)[1]
+        fresh = numpy.isin(numpy.arange(len(window) - period, len(window)), first_visits)  # reads of cells unwritten in the window
+        fresh_x, fresh_y, fresh_colours = last[fresh, 0], last[fresh, 1], last[fresh, 3]
+
+        # a fresh cell must keep its colour until read, so no later period may write it first, and it must still match
+        periods = numpy.arange(1, min(steps // period, HIGHWAY_STRIDE) + 1)
+        ahead_x = (fresh_x[:, None] + periods * dx) % self.columns
+        ahead_y = (fresh_y[:, None] + periods * dy) % self.rows
+        written = numpy.zeros(self.cells.shape, bool)
+        written[last[:, 1], last[:, 0]] = True
+        matches = self.cells[ahead_y, ahead_x] == fresh_colours[:, None]
+        matches[:, 1:] &= ~written[ahead_y[:, :-1], ahead_x[:, :-1]]  # written n periods on from a fresh cell spoils period n + 1
+        exact = numpy.flatnonzero(~matches.all(axis=0))
+        count = exact[0] if len(exact) else len(periods)
+        if count == 0:
+            self.search_at = self.logged * 2
+            return 0
+
+        # each skipped period leaves the last period's colours moved on, later periods over earlier
+        final = len(last) - 1 - numpy.unique(places[::-1][:period], return_index=True)[1]  # last write of each cell in the period
+        cell_x = (last[final, 0][None, :] + periods[:count, None] * dx) % self.columns
+        cell_y = (last[final, 1][None, :] + periods[:count, None] * dy) % self.rows
+        colours = numpy.broadcast_to(self.colours[0, last[final, 3]], cell_x.shape)
+        latest = cell_x.size - 1 - numpy.unique((cell_y * self.columns + cell_x).ravel()[::-1], return_index=True)[1]
+        self.cells.ravel()[(cell_y * self.columns + cell_x).ravel()[latest]] = colours.ravel()[latest]
+        self.dirty.ravel()[(cell_y * self.columns + cell_x).ravel()[latest]] = 1
+
+        self.xs[0] = (self.xs[0] + count * dx) % self.columns
+        self.ys[0] = (self.ys[0] + count * dy) % self.rows
+        window[:, 0] = (window[:, 0] + count * dx) % self.columns  # the log ends with the same periods, moved on
+        window[:, 1] = (window[:, 1] + count * dy) % self.rows
+        self.log[:len(window)] = window
+        self.logged = self.search_at = len(window)
+        self.highway = highway
+        self.steps += count * period
+        return count * period
@@ -0,0 +1,133 @@
+import argparse
+import sys
+import time
+
+import numpy
+
+import cycle_detection
+import engines
+import life_engine
+import result_cache
+import statistics_writer
+
+PATTERNS = ("checkerboard", "lines", "edges")
+
+
+def parse_size(text):
+    # "1280x720" -> (1280, 720)
+    columns, rows = text.lower().split("x")
+    return int(columns), int(rows)
+
+
+def report_progress(generation, generations, columns, rows, elapsed):
+    rate = generation / elapsed if elapsed > 0 else 0
+    sys.stderr.write("\rgeneration {}/{}  {:,.0f} generations/s  {:,.0f} cell-updates/s".format(generation, generations, rate, rate * columns * rows))
+    sys.stderr.flush()
+
+
+def step_board(board, generations, progress=None, statistics=None, cycle=None):
+    # steps the board, returning the living cells after every generation and reporting progress to stderr
+    # with a cycle detector it stops early once the board repeats, as nothing new can happen after that
+    populations = numpy.zeros(generations, numpy.int64)
+    start = last_report = time.perf_counter()
+    stepped = 0
+    while stepped < generations:
+        board.step()
+        populations[stepped] = board.living_cells
+        stepped += 1
+        if statistics is not None:
+            statistics.add_generation(board.generation, board.living_cells, board.births, board.deaths)
+        if cycle is not None:
+            cycle.update(board.changed_cells())
+            if cycle.record(board.generation) is not None:
+                break
+
+        now = time.perf_counter()
+        if progress is not None and now - last_report >= progress:
+            report_progress(stepped, generations, board.columns, board.rows, now - start)
+            last_report = now
+    if progress is not None:
+        report_progress(stepped, generations, board.columns, board.rows, time.perf_counter() - start)
+        sys.stderr.write("\n")
+    if cycle is not None and cycle.period is not None and progress is not None:
+        sys.stderr.write(cycle.describe() + ", stopped at generation {}\n".format(board.generation))
+    return populations[:stepped]
+
+
+def run(columns, rows, rule, percentage, seed=None, generations=1000, engine="bitboard", wrapping=True,
+        output=None, output_type="value", progress=None, cache=None, stop_on_cycle=False):
+    # steps a board with no window and returns the living cells after every generation
+    board = engines.ENGINES[engine](life_engine.initial_cells(columns, rows, percentage, seed), wrapping)
+    life_engine.set_engine_rule(board, rule)
+
+    cycle = None
+    if stop_on_cycle:
+        if cache is not None or not hasattr(board, "changed_cells"):
+            raise ValueError("stopping on a cycle needs an engine that reports changed cells and no cache")
+        cycle = cycle_detection.CycleDetector()
+
+    statistics = None
+    if output is not None:
+        statistics = statistics_writer.StatisticsWriter(output, output_type)
+        statistics.start(life_engine.population_header(columns, rows, percentage, rule, seed), columns * rows)
+
+    if cache is None:
+        populations = step_board(board, generations, progress, statistics, cycle)
+    else:  # only the generations past the longest cached run are stepped, and only populations are cached
+        key = cache.key(engine, rule, board.wrapping, columns, rows, percentage, seed)
+        populations = result_cache.cached_run(cache, key, board, generations, lambda board, generations: step_board(board, generations, progress))
+        if statistics is not None:
+            for generation, living_cells in enumerate(populations, 1):
+                statistics.add_generation(generation, int(living_cells))
+
+    if statistics is not None:
+        statistics.close()
+    if hasattr(board, "close"):
+        board.close()
+    return populations
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Run the game of life without a window and write the population of every generation.")
+    parser.add_argument("--size", type=parse_size, default=(128, 72), help="board size as COLUMNSxROWS (default 128x72)")
+    parser.add_argument("--rule", default="Conway's Life", help="name from RULES, RANGE_RULES or ISOTROPIC_RULES, a b/s code like b36s23 or b2-a/s12 or a larger than life code like r5,c0,m1,s34..58,b34..45,nm")
+    start = parser.add_mutually_exclusive_group()
+    start.add_argument("--density", type=float, default=0.3, help="chance of each cell starting alive (default 0.3)")
+    start.add_argument("--pattern", choices=PATTERNS, help="start from a pattern instead of a random density")
+    parser.add_argument("--seed", default=None, help="seed for the random starting population")
+    parser.add_argument("--generations", type=int, default=1000)
+    parser.add_argument("--engine", choices=engines.available_engines(), default="bitboard")
+    parser.add_argument("--no-wrapping", dest="wrapping", action="store_false", help="dead cells past the edges instead of a torus")
+    parser.add_argument("--output", default="population.txt", help="file for the header and populations")
+    output_type = parser.add_mutually_exclusive_group()
+    output_type.add_argument("--percentage", dest="output_type", action="store_const", const="percentage", default="value",
+                             help="write the percentage of living cells instead of the count")
+    output_type.add_argument("--format", dest="output_type", choices=statistics_writer.FORMATS,
+                             help="value or percentage lines, or csv or binary rows with births and deaths too")
+    parser.add_argument("--progress", type=float, default=1.0, help="seconds between progress reports, 0 for none")
+    parser.add_argument("--cache", default=None, help="directory of cached results to reuse and add to")
+    parser.add_argument("--cache-size", type=float, default=500, help="most megabytes the cache may use (default 500)")
+    parser.add_argument("--stop-on-cycle", action="store_true", help="stop once the board is still or repeating (not with --cache or hashlife)")
+    args = parser.parse_args(args)
+
+    try:
+        rule = life_engine.find_rule(args.rule)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if not life_engine.engine_runs_rule(engines.ENGINES[args.engine], rule):
+        parser.error("the {} engine cannot run {}".format(args.engine, rule[2]))
+    if args.stop_on_cycle and args.cache:
+        parser.error("--stop-on-cycle cannot be used with --cache")
+    if args.stop_on_cycle and not hasattr(engines.ENGINES[args.engine], "changed_cells"):
+        parser.error("the {} engine cannot stop on a cycle".format(args.engine))
+
+    columns, rows = args.size
+    percentage = args.pattern or args.density
+    cache = result_cache.ResultCache(args.cache, args.cache_size * 1024 ** 2) if args.cache else None
+    run(columns, rows, rule, percentage, args.seed, args.generations, args.engine, args.wrapping,
+        args.output, args.output_type, args.progress or None, cache, args.stop_on_cycle)
+
+
+if __name__ == "__main__":
+    main()
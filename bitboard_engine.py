@@ -0,0 +1,175 @@
+import time
+
+import numpy
+
+import life_engine
+
+WORD_BITS = 64
+
+
+def pack_cells(cells):
+    # each row packed into uint64 words, bit j of word w holding column 64w + j
+    cells = numpy.asarray(cells, dtype=numpy.uint8)
+    rows, columns = cells.shape
+    words = -(-columns // WORD_BITS)
+    padded = numpy.zeros((rows, words * WORD_BITS), numpy.uint8)
+    padded[:, :columns] = cells
+    return numpy.packbits(padded, axis=1, bitorder="little").view("<u8").astype(numpy.uint64)
+
+
+def unpack_words(words, columns):
+    cells = numpy.unpackbits(words.astype("<u8").view(numpy.uint8), axis=1, bitorder="little")
+    return cells[:, :columns]
+
+
+def popcount(words):
+    if hasattr(numpy, "bitwise_count"):
+        return int(numpy.bitwise_count(words).sum())
+    return int(numpy.unpackbits(words.view(numpy.uint8)).sum())
+
+
+def half_add(a, b):
+    return a ^ b, a & b
+
+
+def full_add(a, b, c):
+    partial = a ^ b
+    return partial ^ c, (a & b) | (partial & c)
+
+
+class BitboardEngine:
+    # 64 cells per word, next generation found with bit-parallel adders over the neighbor planes
+    def __init__(self, cells, wrapping=True):
+        self.wrapping = wrapping
+        self.generation = 0
+        self.cells_per_second = None
+        self.births = self.deaths = 0  # cells born and died in the last step
+        self.rule = None
+        self.set_cells(cells)
+        self.set_rule([3], [2, 3])
+
+    def set_rule(self, birth, survival):
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+
+    def set_cells(self, cells):
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        self.rows, self.columns = cells.shape
+        self.words = pack_cells(cells)
+        self.previous_words = self.words
+
+        # bits past the last column are kept dead
+        self.mask = pack_cells(numpy.ones((1, self.columns), numpy.uint8))[0]
+        self.last_bit = numpy.uint64((self.columns - 1) % WORD_BITS)
+
+        self.living_cells = popcount(self.words)
+
+    def get_cells(self):
+        return unpack_words(self.words, self.columns)
+
+    def changed_cells(self):
+        # flat indices of the cells the last step changed, only changed words are unpacked
+        changed = (self.words ^ self.previous_words).reshape(-1)
+        words = numpy.flatnonzero(changed)
+        bits = numpy.flatnonzero(numpy.unpackbits(changed[words].astype("<u8").view(numpy.uint8), bitorder="little"))
+        words = words[bits // WORD_BITS]
+        row_words = self.words.shape[1]
+        return words // row_words * self.columns + words % row_words * WORD_BITS + bits % WORD_BITS
+
+    def flip(self, x, y):
+        # for clicking on individual cells
+        bit = numpy.uint64(1) << numpy.uint64(x % WORD_BITS)
+        self.words[y, x // WORD_BITS] ^= bit
+        self.living_cells += (-1, 1)[bool(self.words[y, x // WORD_BITS] & bit)]
+
+    def shift_west(self, words):
+        # each cell gets the value of the cell to its left
+        shifted = words << numpy.uint64(1)
+        shifted[:, 1:] |= words[:, :-1] >> numpy.uint64(WORD_BITS - 1)
+        if self.wrapping:
+            shifted[:, 0] |= (words[:, -1] >> self.last_bit) & numpy.uint64(1)
+        return shifted
+
+    def shift_east(self, words):
+        # each cell gets the value of the cell to its right
+        shifted = words >> numpy.uint64(1)
+        shifted[:, :-1] |= words[:, 1:] << numpy.uint64(WORD_BITS - 1)
+        if self.wrapping:
+            shifted[:, -1] |= (words[:, 0] & numpy.uint64(1)) << self.last_bit
+        return shifted
+
+    def shift_rows(self, words, direction):
+        # direction 1 gives each cell the value of the cell above, -1 the cell below
+        if self.wrapping:
+            return numpy.roll(words, direction, axis=0)
+        shifted = numpy.zeros_like(words)
+        if direction == 1:
+            shifted[1:] = words[:-1]
+        else:
+            shifted[:-1] = words[1:]
+        return shifted
+
+    def count_bits(self):
+        # live neighbors as 4 bit planes, bit i of the count in plane i
+        west = self.shift_west(self.words)
+        east = self.shift_east(self.words)
+        neighbors = [west, east]
+        for plane in (self.words, west, east):
+            neighbors.append(self.shift_rows(plane, 1))
+            neighbors.append(self.shift_rows(plane, -1))
+
+        ones_a, twos_a = full_add(*neighbors[0:3])
+        ones_b, twos_b = full_add(*neighbors[3:6])
+        ones_c, twos_c = half_add(*neighbors[6:8])
+        bit_0, twos_d = full_add(ones_a, ones_b, ones_c)
+        twos_sum, fours_a = full_add(twos_a, twos_b, twos_c)
+        bit_1, fours_b = half_add(twos_sum, twos_d)
+        bit_2, bit_3 = half_add(fours_a, fours_b)
+        return bit_0, bit_1, bit_2, bit_3
+
+    @staticmethod
+    def count_equals(bits, count):
+        # plane of cells with exactly count live neighbors
+        match = None
+        for i, bit in enumerate(bits):
+            plane = bit if count >> i & 1 else ~bit
+            match = plane if match is None else match & plane
+        return match
+
+    def step(self):
+        bits = self.count_bits()
+        born = numpy.zeros_like(self.words)
+        for count in self.rule[0]:
+            born |= self.count_equals(bits, count)
+        survive = numpy.zeros_like(self.words)
+        for count in self.rule[1]:
+            survive |= self.count_equals(bits, count)
+
+        born &= ~self.words & self.mask
+        self.previous_words = self.words
+        self.words = born | (survive & self.words & self.mask)
+        self.births = popcount(born)
+        living_cells = popcount(self.words)
+        self.deaths = self.living_cells + self.births - living_cells
+        self.living_cells = living_cells
+        self.generation += 1
+
+    def advance(self, generations):
+        start = time.perf_counter()
+        for i in range(generations):
+            self.step()
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            self.cells_per_second = generations * self.rows * self.columns / elapsed
+
+
+if __name__ == "__main__":
+    # throughput against the byte per cell array engine
+    cells = life_engine.initial_cells(1920, 1080, 0.3, seed="nyaaa")
+    for engine_type in (life_engine.ArrayEngine, BitboardEngine):
+        engine = engine_type(cells)
+        start = time.perf_counter()
+        engine.advance(50)
+        cells_per_second = 50 * cells.size / (time.perf_counter() - start)
+        print("{}: {:,.0f} cells/second".format(engine_type.__name__, cells_per_second))
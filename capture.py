@@ -0,0 +1,249 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+FORMATS = ("apng", "raw")  # raw is rgb24 frames back to back, eg ffmpeg -f rawvideo -pixel_format rgb24 -video_size WxH -i file
+STRIP_BYTES = 16 * 1024 ** 2  # most image bytes made at once, so posters far bigger than memory still work
+COMPRESSION_LEVEL = 3  # zlib level, higher ones take twice as long for a few percent
+
+
+def chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def create(path):
+    # file opened for writing, making its directory first so nothing is made until something is captured
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(path, "wb")
+
+
+def image_strips(cells, colours=None, scale=(1, 1)):
+    # rgb pixels of the board, each cell scale pixels, in strips of whole cell rows
+    # colours are the board's colour of every cell, or None for white
+    rows, columns = cells.shape
+    row_bytes = columns * scale[0] * scale[1] * 3
+    strip_rows = max(1, STRIP_BYTES // row_bytes)
+    for top in range(0, rows, strip_rows):
+        strip = cells[top:top + strip_rows, :, None]
+        if colours is None:
+            pixels = numpy.repeat(strip * numpy.uint8(255), 3, axis=2)
+        else:
+            pixels = colours[top:top + strip_rows] * strip
+        if scale != (1, 1):
+            pixels = numpy.repeat(numpy.repeat(pixels, scale[1], axis=0), scale[0], axis=1)
+        yield pixels
+
+
+class PngWriter:
+    # png or animated png written a strip of rows at a time, never holding a whole image
+    def __init__(self, path, width, height, animated=False, delay=(1, 30)):
+        self.path = path
+        self.file = create(path)
+        self.width = width
+        self.height = height
+        self.animated = animated
+        self.delay = delay  # seconds per frame as a fraction
+        self.frames = 0
+        self.sequence = 0  # shared by the frame control and frame data chunks of an animation
+        self.compressor = None
+
+        self.file.write(PNG_SIGNATURE)
+        self.file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))  # 8 bit rgb
+        if animated:  # frame count is written over at the end, once it is known
+            self.animation_control = self.file.tell()
+            self.file.write(chunk(b"acTL", struct.pack(">II", 1, 0)))
+
+    def start_frame(self):
+        if self.animated:
+            self.file.write(chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.next_sequence(), self.width, self.height, 0, 0,
+                                                       self.delay[0], self.delay[1], 0, 0)))
+        self.compressor = zlib.compressobj(COMPRESSION_LEVEL)
+
+    def write_rows(self, pixels):
+        # pixels of the next rows of the frame, shaped (rows, width, 3)
+        rows = numpy.zeros((len(pixels), 1 + self.width * 3), numpy.uint8)  # each row starts with filter type 0
+        rows[:, 1:] = pixels.reshape(len(pixels), -1)
+        self.write_data(self.compressor.compress(rows.tobytes()))
+
+    def end_frame(self):
+        self.write_data(self.compressor.flush())
+        self.compressor = None
+        self.frames += 1
+
+    def write_data(self, data):
+        if not data:
+            return
+        if self.frames == 0:  # the first frame is the still image apps without animation support show
+            self.file.write(chunk(b"IDAT", data))
+        else:
+            self.file.write(chunk(b"fdAT", struct.pack(">I", self.next_sequence()) + data))
+
+    def next_sequence(self):
+        self.sequence += 1
+        return self.sequence - 1
+
+    def close(self):
+        if self.animated:
+            end = self.file.tell()
+            self.file.seek(self.animation_control)
+            self.file.write(chunk(b"acTL", struct.pack(">II", max(1, self.frames), 0)))
+            self.file.seek(end)
+        self.file.write(chunk(b"IEND", b""))
+        self.file.close()
+
+    def abort(self):
+        # an image that failed partway is deleted rather than left truncated
+        self.file.close()
+        os.remove(self.path)
+
+
+def save_png(path, cells, colours=None, scale=(1, 1)):
+    # png of the whole board, however big, written in row strips
+    rows, columns = cells.shape
+    writer = PngWriter(path, columns * scale[0], rows * scale[1])
+    try:
+        writer.start_frame()
+        for pixels in image_strips(cells, colours, scale):
+            writer.write_rows(pixels)
+        writer.end_frame()
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+class Recorder:
+    # animation of frames streamed to a file as they come, in apng or raw video
+    def __init__(self, path, shape, colours=None, scale=(1, 1), file_format="apng", frame_rate=30):
+        if file_format not in FORMATS:
+            raise ValueError("file format must be one of {}".format(", ".join(FORMATS)))
+        self.path = path
+        self.shape = shape
+        self.colours = colours
+        self.scale = scale
+        self.frames = 0
+        width, height = shape[1] * scale[0], shape[0] * scale[1]
+        if file_format == "apng":
+            self.png = PngWriter(path, width, height, animated=True, delay=(1, int(frame_rate)))
+            self.file = None
+        else:
+            self.png = None
+            self.file = create(path)
+
+    def add_frame(self, cells):
+        if self.png is not None:
+            self.png.start_frame()
+        for pixels in image_strips(cells, self.colours, self.scale):
+            if self.png is not None:
+                self.png.write_rows(pixels)
+            else:
+                self.file.write(pixels.tobytes())
+        if self.png is not None:
+            self.png.end_frame()
+        self.frames += 1
+
+    def close(self):
+        if self.png is not None:
+            self.png.close()
+        else:
+            self.file.close()
+
+    def abort(self):
+        if self.png is not None:
+            self.png.abort()
+        else:
+            self.file.close()
+            os.remove(self.path)
+
+
+class Capture:
+    # screenshots, posters and recordings encoded on a background thread from copies of the board
+    def __init__(self, max_frames=16):
+        self.queue = queue.Queue()
+        self.waiting_frames = threading.BoundedSemaphore(max_frames)  # frames past this many are dropped, not waited for
+        self.dropped = 0
+        self.recording = False
+        self.recorder = None  # used only by the thread
+        self.recording_path = None
+        self.error = None  # what made the last capture fail, raised from the next add_frame or close
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def save_png(self, path, cells, colours=None, scale=(1, 1), done=None):
+        self.queue.put(("png", numpy.array(cells, numpy.uint8), path, colours, scale, done))
+
+    def start_recording(self, path, shape, colours=None, scale=(1, 1), file_format="apng", frame_rate=30):
+        self.recording = True
+        self.dropped = 0
+        self.queue.put(("start", path, shape, colours, scale, file_format, frame_rate))
+
+    def add_frame(self, cells):
+        # returns whether the frame was kept, frames of a different shape to the recording are skipped when written
+        self.raise_error()
+        if not self.recording or not self.waiting_frames.acquire(blocking=False):
+            self.dropped += self.recording
+            return False
+        self.queue.put(("frame", numpy.array(cells, numpy.uint8)))
+        return True
+
+    def stop_recording(self, done=None):
+        self.recording = False
+        self.queue.put(("stop", done))
+
+    def close(self):
+        # waits for everything queued to be written
+        if self.recording:
+            self.stop_recording()
+        self.queue.put(None)
+        self.thread.join()
+        self.raise_error()
+
+    def raise_error(self):
+        error, self.error = self.error, None
+        if error is not None:
+            raise RuntimeError("Capture failed: {}".format(error)) from error
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            try:
+                self.run_job(job)
+            except Exception as error:  # kept for the window, and the thread carries on with the next captures
+                self.error = error
+                if job[0] != "png":  # frames stop being queued for a recording that is gone
+                    self.recording = False
+                    if self.recorder is not None:
+                        try:
+                            self.recorder.abort()
+                        except OSError:
+                            pass
+                        self.recorder = None
+            finally:
+                if job[0] == "frame":
+                    self.waiting_frames.release()
+
+    def run_job(self, job):
+        if job[0] == "png":
+            save_png(job[2], job[1], job[3], job[4])
+            if job[5] is not None:
+                job[5](job[2])
+        elif job[0] == "start":
+            self.recorder = Recorder(*job[1:])
+            self.recording_path = job[1]
+        elif job[0] == "frame":
+            if self.recorder is not None and job[1].shape == self.recorder.shape:
+                self.recorder.add_frame(job[1])
+        elif job[0] == "stop" and self.recorder is not None:
+            self.recorder.close()
+            if job[1] is not None:
+                job[1](self.recording_path, self.recorder.frames)
+            self.recorder = None
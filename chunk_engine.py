@@ -0,0 +1,159 @@
+import numpy
+
+import life_engine
+
+CHUNK_SIZE = 32  # width and height of a chunk in cells
+
+
+class ChunkEngine:
+    # board split into chunks, chunks that are still or period 2 go to sleep and are skipped
+    def __init__(self, cells, wrapping=True):
+        self.wrapping = wrapping
+        self.generation = 0
+        self.rule = None
+        self.set_cells(cells)
+        self.set_rule([3], [2, 3])
+
+    def set_rule(self, birth, survival):
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+            self.table = life_engine.rule_table(birth, survival)
+            self.wake_all()  # sleeping chunks might not be settled under a new rule
+
+    def set_cells(self, cells):
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        self.rows, self.columns = cells.shape
+        self.chunk_rows = -(-self.rows // CHUNK_SIZE)
+        self.chunk_columns = -(-self.columns // CHUNK_SIZE)
+
+        # extra row and column at the end are always dead, anything off the board reads from them
+        self.grid = numpy.zeros((self.rows + 1, self.columns + 1), numpy.uint8)
+        self.grid[:-1, :-1] = cells
+        self.previous = self.grid.copy()  # the generation before, which sleeping chunks repeat
+
+        self.read_rows, self.write_rows, self.bottom_rows = self.chunk_indices(self.rows)
+        self.read_columns, self.write_columns, self.right_columns = self.chunk_indices(self.columns)
+
+        self.populations = self.chunk_sums(self.grid)
+        self.previous_populations = self.populations.copy()
+        # births of each chunk in the last step and the one before, which sleeping chunks also repeat
+        self.chunk_births = numpy.zeros_like(self.populations)
+        self.previous_births = numpy.zeros_like(self.populations)
+        self.births = self.deaths = 0
+        self.wake_all()
+
+    def chunk_indices(self, length):
+        # for each chunk along one axis, the cells read with their border and the cells written
+        count = -(-length // CHUNK_SIZE)
+        read = numpy.arange(count)[:, None] * CHUNK_SIZE + numpy.arange(-1, CHUNK_SIZE + 1)
+        if self.wrapping:
+            read[read == -1] = length - 1
+            read[read == length] = 0
+        read[(read < 0) | (read >= length)] = length
+
+        write = numpy.arange(count)[:, None] * CHUNK_SIZE + numpy.arange(CHUNK_SIZE)
+        last = numpy.minimum(CHUNK_SIZE, length - numpy.arange(count) * CHUNK_SIZE) - 1  # last real cell of each chunk
+        write[write >= length] = length
+        return read, write, last
+
+    def chunk_sums(self, grid):
+        sums = numpy.zeros((self.chunk_rows, self.chunk_columns), numpy.int64)
+        for cy in range(self.chunk_rows):
+            for cx in range(self.chunk_columns):
+                sums[cy, cx] = numpy.count_nonzero(grid[self.write_rows[cy][:, None], self.write_columns[cx]])
+        return sums
+
+    def wake_all(self):
+        self.awake = numpy.ones((self.chunk_rows, self.chunk_columns), bool)
+        self.forced = self.awake.copy()
+
+    def wake(self, cy, cx):
+        # wakes a chunk and the chunks around it
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                y, x = cy + dy, cx + dx
+                if self.wrapping:
+                    y %= self.chunk_rows
+                    x %= self.chunk_columns
+                if 0 <= y < self.chunk_rows and 0 <= x < self.chunk_columns:
+                    self.awake[y, x] = True
+                    self.forced[y, x] = True
+
+    @property
+    def living_cells(self):
+        return int(self.populations.sum())
+
+    def step(self):
+        living_cells = self.living_cells
+        cy, cx = numpy.nonzero(self.awake)
+        # an edit breaks the link to the generation before, so edited chunks stay awake a second generation
+        next_awake = self.forced
+        self.forced = numpy.zeros_like(self.awake)
+
+        if len(cy):
+            # every awake chunk with its one cell border, stepped together
+            regions = self.grid[self.read_rows[cy][:, :, None], self.read_columns[cx][:, None, :]]
+            counts = life_engine.count_padded(regions)
+            counts += regions[:, 1:-1, 1:-1] * numpy.uint8(9)
+            new = self.table[counts]
+            rows = self.write_rows[cy][:, :, None]
+            columns = self.write_columns[cx][:, None, :]
+            new[(rows == self.rows) | (columns == self.columns)] = 0  # cells past the board edge stay dead
+
+            # sleeping chunks repeat the generation before, so compare against that
+            changed = new != self.previous[rows, columns]
+            self.previous[rows, columns] = new
+            self.previous_populations[cy, cx] = numpy.count_nonzero(new, axis=(1, 2))
+            self.previous_births[cy, cx] = numpy.count_nonzero(new > regions[:, 1:-1, 1:-1], axis=(1, 2))
+
+            # chunks next to changed edge cells must be awake next generation
+            index = numpy.arange(len(cy))
+            bottom = self.bottom_rows[cy]
+            right = self.right_columns[cx]
+            top_edge = changed[:, 0, :].any(axis=1)
+            bottom_edge = changed[index, bottom, :].any(axis=1)
+            left_edge = changed[:, :, 0].any(axis=1)
+            right_edge = changed[index, :, right].any(axis=1)
+            wakes = ((0, 0, changed.any(axis=(1, 2))),
+                     (-1, 0, top_edge), (1, 0, bottom_edge), (0, -1, left_edge), (0, 1, right_edge),
+                     (-1, -1, changed[index, 0, 0]), (-1, 1, changed[index, 0, right]),
+                     (1, -1, changed[index, bottom, 0]), (1, 1, changed[index, bottom, right]))
+            for dy, dx, due in wakes:
+                y, x = cy[due] + dy, cx[due] + dx
+                if self.wrapping:
+                    y %= self.chunk_rows
+                    x %= self.chunk_columns
+                else:
+                    inside = (y >= 0) & (y < self.chunk_rows) & (x >= 0) & (x < self.chunk_columns)
+                    y, x = y[inside], x[inside]
+                next_awake[y, x] = True
+
+        self.grid, self.previous = self.previous, self.grid
+        self.populations, self.previous_populations = self.previous_populations, self.populations
+        self.chunk_births, self.previous_births = self.previous_births, self.chunk_births
+        self.births = int(self.chunk_births.sum())
+        self.deaths = living_cells + self.births - self.living_cells
+        self.awake = next_awake
+        self.generation += 1
+
+    def advance(self, generations):
+        for i in range(generations):
+            self.step()
+
+    def flip(self, x, y):
+        # for clicking on individual cells, the chunk and its neighbors are woken
+        self.grid[y, x] = 1 - self.grid[y, x]
+        self.populations[y // CHUNK_SIZE, x // CHUNK_SIZE] += (-1, 1)[self.grid[y, x]]
+        self.wake(y // CHUNK_SIZE, x // CHUNK_SIZE)
+
+    def get_cells(self):
+        return self.grid[:-1, :-1]
+
+    def changed_cells(self):
+        # both buffers hold whole generations, sleeping chunks included
+        return numpy.flatnonzero(self.grid[:-1, :-1] != self.previous[:-1, :-1])
+
+    def get_awake_rects(self):
+        # cell rects (x, y, width, height) of the awake chunks, everything else is unchanged
+        return [(cx * CHUNK_SIZE, cy * CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE) for cy, cx in zip(*numpy.nonzero(self.awake))]
@@ -0,0 +1,55 @@
+import collections
+
+import numpy
+
+
+def cell_keys(indices):
+    # random looking 64 bit key for each cell index (splitmix64), so no key table is needed even on an unbounded plane
+    keys = numpy.asarray(indices, numpy.int64).astype(numpy.uint64) + numpy.uint64(0x9E3779B97F4A7C15)
+    keys = (keys ^ (keys >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+    keys = (keys ^ (keys >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+    return keys ^ (keys >> numpy.uint64(31))
+
+
+class CycleDetector:
+    # zobrist hash of the board changed only by the cells that flip, and the generations recent hashes were seen at
+    def __init__(self, history=1024):
+        self.history = history  # cycles longer than this many generations are not noticed
+        self.reset()
+
+    def reset(self, generation=0):
+        # for a new board, or after an edit or rule change breaks the link with earlier generations
+        self.hash = 0  # hashes are relative to the board at the reset, which is all a repeat needs
+        self.seen = dict()
+        self.order = collections.deque()
+        self.period = None
+        self.first_repeat = None
+        self.record(generation)
+
+    def update(self, changed):
+        # changed are the indices of the cells that flipped since the last update
+        if len(changed):
+            self.hash ^= int(numpy.bitwise_xor.reduce(cell_keys(changed)))
+
+    def record(self, generation):
+        # returns the period the first time the board at generation matches an earlier one, otherwise None
+        if self.period is not None:
+            return None
+        earlier = self.seen.get(self.hash)
+        if earlier is not None:
+            self.period = generation - earlier
+            self.first_repeat = generation
+            return self.period
+
+        self.seen[self.hash] = generation
+        self.order.append(self.hash)
+        if len(self.order) > self.history:
+            del self.seen[self.order.popleft()]
+        return None
+
+    def describe(self):
+        if self.period is None:
+            return "Not periodic yet"
+        if self.period == 1:
+            return "Still from generation {}".format(self.first_repeat - 1)
+        return "Period {} from generation {}".format(self.period, self.first_repeat - self.period)
@@ -0,0 +1,26 @@
+import life_engine
+import bitboard_engine
+import hashlife
+import active_engine
+import sparse_engine
+import chunk_engine
+import parallel_engine
+import jit_engine
+import range_engine
+import isotropic_engine
+
+ENGINES = {"array": life_engine.ArrayEngine,
+           "bitboard": bitboard_engine.BitboardEngine,
+           "hashlife": hashlife.HashLifeEngine,
+           "active": active_engine.ActiveEngine,
+           "sparse": sparse_engine.SparseEngine,
+           "chunk": chunk_engine.ChunkEngine,
+           "parallel": parallel_engine.ParallelEngine,
+           "jit": jit_engine.JitEngine,
+           "range": range_engine.RangeEngine,
+           "isotropic": isotropic_engine.IsotropicEngine}  # every engine with the step/advance api, by name
+
+
+def available_engines():
+    # engine names that can run with the packages installed
+    return [name for name in ENGINES if name != "jit" or jit_engine.JIT_AVAILABLE]
@@ -0,0 +1,43 @@
+import numpy
+
+import life_engine
+
+
+def seeded_boards(columns, rows, percentage, seeds):
+    # one starting board per seed, each the same as Board.populate(percentage, seed) makes
+    return numpy.stack([life_engine.initial_cells(columns, rows, percentage, seed) for seed in seeds])
+
+
+class EnsembleEngine:
+    # many independent boards of one size and rule held in a (boards, rows, columns) array and stepped together
+    def __init__(self, boards, wrapping=True):
+        self.cells = numpy.array(boards, dtype=numpy.uint8)
+        self.boards, self.rows, self.columns = self.cells.shape
+        self.wrapping = wrapping
+        self.generation = 0
+        self.living_cells = numpy.count_nonzero(self.cells, axis=(1, 2))
+        self.rule = None
+        self.set_rule([3], [2, 3])
+
+    def set_rule(self, birth, survival):
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+            self.table = life_engine.rule_table(birth, survival)
+
+    def step(self):
+        self.cells = life_engine.next_generation(self.cells, self.table, self.wrapping)
+        self.living_cells = numpy.count_nonzero(self.cells, axis=(1, 2))
+        self.generation += 1
+
+    def advance(self, generations):
+        for i in range(generations):
+            self.step()
+
+    def populations(self, generations):
+        # steps every board and returns their living cells as a (boards, generations) array
+        series = numpy.zeros((self.boards, generations), numpy.int64)
+        for generation in range(generations):
+            self.step()
+            series[:, generation] = self.living_cells
+        return series
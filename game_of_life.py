@@ -1,6 +1,20 @@
 import pygame
 import random
+import math
+import numpy
 import os
+import gc
+import sys
+import queue
+import threading
+import time
+import life_engine
+import engines
+import result_cache
+import statistics_writer
+import cycle_detection
+import save_state
+import capture
 
 os.environ["SDL_VIDEO_WINDOW_POS"] = "0,30"
 
@@ -26,107 +40,182 @@ class Board:
     def flip_tile(self, coords):
         # for when tile is clicked
         board_size = self.get_size(old=True)
-        if coords[0] < board_size[0] and coords[1] < board_size[1]:
+        if 0 <= coords[0] < board_size[0] and 0 <= coords[1] < board_size[1]:
             coords[0] //= self.tile_dims[0]
             coords[1] //= self.tile_dims[1]
             self.tiles[coords[1]][coords[0]].change_type(flip=True)
+            self.cells[coords[1], coords[0]] ^= 1
+            self.cycle.reset(self.generation)
 
     def populate(self, percentage, seed=None):
-        # update values
-        self.tiles = []
-        self.living_cells = 0
-        self.generation = 0
-        self.columns = self.new_columns
-        self.rows = self.new_rows
-
-        if OUTPUT_TO_FILE is not False:
-            # empty and create title line for population.txt
-            dimensions_string = str(self.columns) + "x" + str(self.rows)
-            if type(percentage) in (int, float):
-                percentage_string = str(percentage * 100) + "% density"
-            else:
-                percentage_string = percentage
-            mode_code = "b" + "".join([str(num) for num in RULES[mode][0]]) + "s" + "".join([str(num) for num in RULES[mode][1]])
-            mode_string = "{}-Type Mode: {} ({})".format(RULES[mode][3], RULES[mode][2], mode_code)
-            seed_string = "seed: {} {}".format(type(seed), seed)
-            open("population.txt", "w").write(dimensions_string + " " + percentage_string + " " + mode_string + " " + seed_string)
-
         random.seed(None)  # for always random colour
-
         colour_combo = list(range(5))
         random.shuffle(colour_combo)
 
-        random.seed(seed)  # user-entered seed
-
-        for y in range(self.rows):
-            row = []
-            for x in range(self.columns):
-                # possible colour segments dependant on position
-                colours = (round(x * 255 / self.columns),
-                           round(y * 255 / self.rows),
-                           255 - round(x * 255 / self.columns),
-                           255 - round(y * 255 / self.rows),
-                           255)
-                # random 3 of the 5 possibilities
-                colour = (colours[colour_combo[0]], colours[colour_combo[1]], colours[colour_combo[2]])
-
-                # determine whether tile is living or dead
-                if percentage == "checkerboard":
-                    tile_state = (x + y) % 2 == 1
-                elif percentage == "lines":
-                    tile_state = x % 2 == 1
-                elif percentage == "edges":
-                    tile_state = x == 0 or x == self.columns - 1 or y == 0 or y == self.rows - 1
-                else:
-                    tile_state = random.random() < percentage
-
-                self.living_cells += tile_state
-                row.append(Tile(self, tile_state, (x, y), colour))
-
-            self.tiles.append(row)
+        cells = life_engine.initial_cells(self.new_columns, self.new_rows, percentage, seed)
+        header = life_engine.population_header(self.new_columns, self.new_rows, percentage, RULES[mode], seed)
+        self.start(cells, 0, colour_combo, seed, header)
+
+    def load(self, path):
+        # board, rule, generation, wrapping, colours and seed from a save
+        global mode, WRAPPING
+        state, cells = save_state.load(path)
+        codes = [life_engine.code_of_rule(rule) for rule in RULES]
+        if state["rule"] not in codes:
+            raise ValueError("{} uses the rule {} which isnt in RULES".format(path, state["rule"]))
+        # the saved index unless RULES has changed since
+        mode = state["mode"] if state["mode"] < len(codes) and codes[state["mode"]] == state["rule"] else codes.index(state["rule"])
+        WRAPPING = state["wrapping"]
+        self.new_rows, self.new_columns = cells.shape  # later populates keep the size
+        header = life_engine.population_header(self.new_columns, self.new_rows, "loaded from " + path, RULES[mode], state["seed"])
+        self.start(cells, state["generation"], state["colour_combo"], state["seed"], header)
+
+    def save(self, path, compress=True, done=None):
+        # written on a background thread from a copy of the board, returns the thread
+        state = {"mode": mode, "rule": life_engine.code_of_rule(RULES[mode]), "generation": self.generation,
+                 "wrapping": WRAPPING, "colour_combo": self.colour_combo, "seed": self.seed}
+        return save_state.save_async(path, self.get_cells(), state, compress, done)
+
+    def start(self, cells, generation, colour_combo, seed, header):
+        # update values
+        self.rows, self.columns = cells.shape
+        self.generation = generation
+        self.births = self.deaths = 0
+        self.changed = list()
+        self.cycle = cycle_detection.CycleDetector(CYCLE_HISTORY)
+        self.cycle.reset(generation)
+        self.colour_combo = colour_combo
+        self.seed = seed
+        self.colours = Gradient(colour_combo, cells.shape)
+
+        if STATISTICS is not None:
+            # empty and create title line for the statistics file
+            STATISTICS.start(header, self.columns * self.rows)
+
+        self.set_board(cells)
+
+    def set_board(self, cells):
+        # tiles made straight from the cells
+        gc.unfreeze()  # the last board's tiles can be collected again
+        self.tiles = [[Tile(self, state, (x, y)) for x, state in enumerate(row)] for y, row in enumerate(cells.tolist())]
+        self.living_cells = int(numpy.count_nonzero(cells))
 
         for row in self.tiles:
             for tile in row:
                 tile.update_neighbors()
 
+        # copy of the tile states kept for drawing, changed only where tiles change
+        self.cells = numpy.array(cells, numpy.uint8)
+
+        # tiles last as long as the board, so they are kept out of full collections, which walk every tile holding the GIL
+        # long enough to stall the window
+        gc.collect()
+        gc.freeze()
+
+    def get_cells(self):
+        return self.cells
+
     def neighbor_check(self):
+        self.births = self.deaths = 0  # counted by the tiles as they find their new states
+        self.changed = list()
         for row in self.tiles:
             for tile in row:
                 tile.check_neighbors()
 
+    def output_population(self, generation):
+        # record the generation's statistics before changing tiles
+        if STATISTICS is not None:
+            STATISTICS.add_generation(generation, self.living_cells, self.births, self.deaths)
+
     def update_tiles(self):
-        # append value to tile before changing tiles
-        if OUTPUT_TO_FILE == "value":
-            open("population.txt", "a").write("\n" + str(self.living_cells))
-        elif OUTPUT_TO_FILE == "percentage":
-            open("population.txt", "a").write("\n" + str(round(100 * self.living_cells / self.columns / self.rows, 2)))
+        self.output_population(self.generation + 1)
 
         # tiles switched to their new state
         for row in self.tiles:
             for tile in row:
                 tile.change_type()
         self.generation += 1
+        self.cells.reshape(-1)[self.changed] ^= 1
+        self.check_cycle()
+
+    def changed_cells(self):
+        # indices (y * columns + x) of the tiles changed by the last generation
+        return self.changed
+
+    def check_cycle(self):
+        # compares the new generation with recent ones through the board hash, None changes means it cant be followed
+        changed = self.changed_cells()
+        if changed is not None:
+            self.cycle.update(changed)
+            self.cycle.record(self.generation)
 
-    def draw_tiles(self, surface):
-        # draw each board tile on the surface
-        for row in self.tiles:
-            for tile in row:
-                if tile.state:  # if living
-                    rect = tile.get_rect()
-                    pygame.draw.rect(surface, tile.get_colour(), rect)
-
-    def draw(self, surface):
-        # bounding box for board when surface size is different
-        size = self.get_size(old=True)
-        rect = pygame.Rect(-1, -1, size[0] + 2, size[1] + 2)
-        pygame.draw.rect(surface, (255, 255, 255), rect, 1)
+
+class EngineBoard(Board):
+    # board whose cells live in an engine from life_engine.py rather than in Tile objects
+    def __init__(self, tile_dims, screen_dims, engine_type):
+        super().__init__(tile_dims, screen_dims)
+        self.engine_type = engine_type
+
+    def flip_tile(self, coords):
+        # for when tile is clicked
+        board_size = self.get_size(old=True)
+        if 0 <= coords[0] < board_size[0] and 0 <= coords[1] < board_size[1]:
+            self.engine.flip(coords[0] // self.tile_dims[0], coords[1] // self.tile_dims[1])
+            self.living_cells = self.engine.living_cells
+            self.cycle.reset(self.generation)
+
+    def set_board(self, cells):
+        if hasattr(self, "engine") and hasattr(self.engine, "close"):
+            self.engine.close()  # parallel engines hold worker processes
+        self.engine = self.engine_type(cells, WRAPPING)
+        self.engine.generation = self.generation
+        self.living_cells = self.engine.living_cells
+
+    def jump(self, generations):
+        # skips ahead, reusing a cached run from the same board and rule when there is one
+        life_engine.set_engine_rule(self.engine, RULES[mode])
+        key = RESULT_CACHE.key(ENGINE, RULES[mode], self.engine.wrapping, self.columns, self.rows, start=result_cache.snapshot(self.engine))
+        stepper = result_cache.advance_generations if STATISTICS is None else result_cache.run_generations  # whole jumps for hashlife
+        populations = result_cache.cached_run(RESULT_CACHE, key, self.engine, generations, stepper)
+        if STATISTICS is not None:  # births and deaths of skipped generations arent known
+            for generation, living_cells in enumerate(populations, self.generation + 1):
+                if living_cells >= 0:  # populations jumped over without statistics arent known either
+                    STATISTICS.add_generation(generation, int(living_cells))
+        self.births = self.deaths = None
+        self.living_cells = self.engine.living_cells
+        self.generation = self.engine.generation
+        self.cycle.reset(self.generation)
+
+    def move_window(self, dx, dy):
+        # unbounded engines show a window of their plane which the arrow keys move
+        if hasattr(self.engine, "move_window"):
+            self.engine.move_window(dx, dy)
+
+    def neighbor_check(self):
+        life_engine.set_engine_rule(self.engine, RULES[mode])
+        self.engine.step()
+        self.living_cells = self.engine.living_cells
+        self.births = self.engine.births
+        self.deaths = self.engine.deaths
+
+    def update_tiles(self):
+        self.output_population(self.engine.generation)
+        self.generation = self.engine.generation
+        self.check_cycle()
+
+    def changed_cells(self):
+        if hasattr(self.engine, "changed_cells"):  # hashlife steps whole nodes and doesnt know
+            return self.engine.changed_cells()
+        return None
+
+    def get_cells(self):
+        return self.engine.get_cells()
 
 
 class Tile:
-    def __init__(self, board, state, pos, colour):
+    def __init__(self, board, state, pos):
         self.board = board
         self.state = state  # 0 as dead, 1 as live
-        self.colour = colour
         self.column = pos[0]
         self.row = pos[1]
 
@@ -189,6 +278,8 @@ class Tile:
             if alive_neighbors in RULES[mode][0]:
                 self.new_state = 1
                 self.board.living_cells += 1
+                self.board.births += 1
+                self.board.changed.append(self.row * self.board.columns + self.column)
             else:
                 self.new_state = 0
         else:
@@ -197,17 +288,33 @@ class Tile:
             else:
                 self.new_state = 0
                 self.board.living_cells -= 1
-
-    def get_rect(self):
-        coords = (self.column * self.board.tile_dims[0], self.row * self.board.tile_dims[1])
-        dimensions = (self.board.tile_dims[0], self.board.tile_dims[1])
-        return pygame.Rect(*coords, *dimensions)
-
-    def get_colour(self):
-        if COLOUR:
-            return self.colour
-        else:
-            return (255, 255, 255)
+                self.board.deaths += 1
+                self.board.changed.append(self.row * self.board.columns + self.column)
+
+
+class Gradient:
+    # colour of each cell, a random 3 of the 5 gradients across the board, worked out only for the cells drawn
+    def __init__(self, colour_combo, shape):
+        self.colour_combo = colour_combo
+        self.rows, self.columns = shape
+
+    def channels(self, x, y):
+        # red, green and blue at cell coordinates x along a row and y down a column, each varying along one axis at most
+        x = numpy.asarray(x, float)[None, :]
+        y = numpy.asarray(y, float)[:, None]
+        gradients = (numpy.round(x * 255 / self.columns),
+                     numpy.round(y * 255 / self.rows),
+                     255 - numpy.round(x * 255 / self.columns),
+                     255 - numpy.round(y * 255 / self.rows),
+                     numpy.full((1, 1), 255))
+        return [gradients[self.colour_combo[i]].astype(numpy.uint8) for i in range(3)]
+
+    def __getitem__(self, key):
+        # colours of a block of cells, as if indexing an array of every cell's colour
+        y, x = key if isinstance(key, tuple) else (key, slice(None))
+        channels = self.channels(numpy.arange(self.columns)[x], numpy.arange(self.rows)[y])
+        shape = numpy.broadcast_shapes(*(channel.shape for channel in channels))
+        return numpy.stack([numpy.broadcast_to(channel, shape) for channel in channels], axis=-1)
 
 
 class ScreenPrint:
@@ -217,11 +324,11 @@ class ScreenPrint:
         if DISPLAY_TEXT:
             rect = pygame.Rect(0, 0, *FONT.size(string))
             if location == "bottomright":
-                rect.bottomright = board.get_size()
+                rect.bottomright = screen.get_size()
             elif location == "bottomleft":
-                rect.bottomleft = (0, board.get_size()[1])
+                rect.bottomleft = (0, screen.get_size()[1])
             elif location == "topright":
-                rect.topright = (board.get_size()[0], 0)
+                rect.topright = (screen.get_size()[0], 0)
             elif location == "topleft":
                 rect.topleft = (0, 0)
             return {"surface": FONT.render(string, True, (255, 255, 255)),
@@ -247,55 +354,461 @@ class ScreenPrint:
             return None
 
 
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+def halve(values, cells):
+    # the pyramid level above values, means of blocks of 2 by 2 as 0 to 255, odd edges padded with dead cells
+    rows, columns = values.shape
+    if rows % 2 or columns % 2:
+        values = numpy.pad(values, ((0, rows % 2), (0, columns % 2)))
+    if cells:  # living cells of each block of 4 as 0, 64, 128, 191 and 255, 4 * 64 wrapping round to 0 before the 1 comes off
+        pairs = values[0::2] + values[1::2]
+        total = pairs[:, 0::2] + pairs[:, 1::2]
+        return (total << 6) - (total > 2)
+    pairs = values[0::2].astype(numpy.uint16) + values[1::2]
+    return ((pairs[:, 0::2] + pairs[:, 1::2]) // 4).astype(numpy.uint8)
+
+
+class Viewport:
+    # the part of the board the window shows, one position and zoom for the whole board instead of a rect per tile
+    # zoomed out past a pixel per cell it draws blocks of cells from a pyramid of densities instead
+    def __init__(self, tile_dims):
+        self.tile_dims = tile_dims
+        self.zoom = 1  # multiple of tile_dims, a power of 2
+        self.position = [0, 0]  # pixel of the zoomed board at the window's top left
+        self.levels = list()  # density pyramid, levels[n] is the mean of blocks of 2 ** (n + 1) cells a side as 0 to 255
+        self.levels_version = None  # snapshot the pyramid was last updated from
+        self.band_top = 0  # first row of cells of the band of the pyramid the next snapshot remakes
+        self.shown = None  # visible cells as last presented, for finding what changed by the next frame
+        self.shown_area = None
+        self.shown_view = None
+        self.shown_version = None
+
+    def cell_size(self):
+        return (self.tile_dims[0] * self.zoom, self.tile_dims[1] * self.zoom)
+
+    def level(self):
+        # pyramid level drawn, the first whose blocks are at least a pixel across
+        size = min(self.cell_size())
+        level = 0
+        while size * 2 ** level < 1:
+            level += 1
+        return level
+
+    def board_position(self, pos):
+        # window position as a position on the board drawn at its tile size, as flip_tile takes
+        return [math.floor((pos[i] + self.position[i]) / self.zoom) for i in range(2)]
+
+    def pan(self, dx, dy):
+        self.position[0] -= dx
+        self.position[1] -= dy
+
+    def zoom_by(self, factor, pos):
+        # keeps the part of the board under pos where it is
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * factor))
+        for i in range(2):
+            self.position[i] = round((self.position[i] + pos[i]) * zoom / self.zoom - pos[i])
+        self.zoom = zoom
+
+    def fit(self, shape, screen_size):
+        # biggest zoom up to 1 that shows the whole board
+        self.zoom = 1
+        while self.zoom > MIN_ZOOM and (shape[1] * self.cell_size()[0] > screen_size[0] or shape[0] * self.cell_size()[1] > screen_size[1]):
+            self.zoom /= 2
+        self.position = [0, 0]
+
+    def clamp(self, shape, screen_size):
+        # stops the board being panned entirely out of the window
+        size = self.cell_size()
+        for i in range(2):
+            self.position[i] = min(max(self.position[i], -screen_size[i] + 1), round(shape[1 - i] * size[i]) - 1)
+
+    def view(self, shape, screen_size):
+        return (self.zoom, tuple(self.position), shape, screen_size)
+
+    def visible(self, shape, screen_size, level, rect=None):
+        # blocks of the level inside the window (or rect of it) as (left, top, right, bottom), and their size in pixels
+        rect = pygame.Rect((0, 0), screen_size) if rect is None else rect
+        size = [self.cell_size()[i] * 2 ** level for i in range(2)]
+        rows, columns = ceil_div(shape[0], 2 ** level), ceil_div(shape[1], 2 ** level)
+        left = max(0, math.floor((rect.left + self.position[0]) / size[0]))
+        top = max(0, math.floor((rect.top + self.position[1]) / size[1]))
+        right = min(columns, math.ceil((rect.right + self.position[0]) / size[0]))
+        bottom = min(rows, math.ceil((rect.bottom + self.position[1]) / size[1]))
+        return (left, top, max(left, right), max(top, bottom)), size
+
+    def density(self, cells, level, version):
+        # each level is made from the one below, only when first needed
+        # once the cells change each new snapshot remakes one band of rows of every level, so a whole rebuild is spread over
+        # DENSITY_BANDS frames instead of paid every frame
+        if self.levels and self.levels[0].shape != (ceil_div(cells.shape[0], 2), ceil_div(cells.shape[1], 2)):
+            self.levels = list()
+        if version != self.levels_version:
+            if self.levels:
+                self.update_band(cells)
+            self.levels_version = version
+        while len(self.levels) < level:
+            self.levels.append(halve(self.levels[-1] if self.levels else cells, not self.levels))
+        return self.levels[level - 1]
+
+    def update_band(self, cells):
+        # bands are whole blocks of the top level, so each level's rows of it come from the band's rows of the level below
+        rows = cells.shape[0]
+        unit = 2 ** len(self.levels)
+        height = unit * ceil_div(ceil_div(rows, unit), DENSITY_BANDS)
+        top = self.band_top // unit * unit  # levels added since the last band move its edges
+        bottom = min(rows, top + height)
+        below = cells[top:bottom]
+        for n, values in enumerate(self.levels, 1):
+            below = halve(below, n == 1)
+            values[top >> n:(top >> n) + below.shape[0]] = below
+        self.band_top = bottom % rows
+
+    def forget_density(self):
+        # boards replaced rather than stepped get a whole new pyramid on the next frame
+        self.levels = list()
+
+    def paint(self, values, x, y, colours, density):
+        # rgb pixels of cells or densities at cell coordinates x and y, white when colours is None
+        if colours is None:
+            return numpy.repeat((values if density else values * numpy.uint8(255))[:, :, None], 3, axis=2)
+        pixels = numpy.empty(values.shape + (3,), numpy.uint8)
+        for i, channel in enumerate(colours.channels(x, y)):
+            if density:
+                pixels[:, :, i] = channel.astype(numpy.uint16) * values // 255
+            else:
+                numpy.multiply(channel, values, out=pixels[:, :, i])
+        return pixels
+
+    def draw_blocks(self, surface, values, colours, area, size, level):
+        # blocks of area one pixel each, scaled up to their size and put where the view has them
+        left, top, right, bottom = area
+        if right <= left or bottom <= top:
+            return
+        x = (numpy.arange(left, right) + 0.5) * 2 ** level - 0.5  # the cell at the middle of each block
+        y = (numpy.arange(top, bottom) + 0.5) * 2 ** level - 0.5
+        block_surface = pygame.surfarray.make_surface(self.paint(values[top:bottom, left:right], x, y, colours, level > 0).swapaxes(0, 1))
+        screen_rect = pygame.Rect(round(left * size[0] - self.position[0]), round(top * size[1] - self.position[1]), 0, 0)
+        screen_rect.width = round(right * size[0] - self.position[0]) - screen_rect.left
+        screen_rect.height = round(bottom * size[1] - self.position[1]) - screen_rect.top
+        if screen_rect.size != block_surface.get_size():
+            block_surface = pygame.transform.scale(block_surface, screen_rect.size)
+        surface.blit(block_surface, screen_rect)
+
+    def draw(self, surface, cells, colours, version):
+        # everything in the window, drawn from the pyramid level that suits the zoom
+        surface.fill((0, 0, 0))
+        level = self.level()
+        values = cells if level == 0 else self.density(cells, level, version)
+        area, size = self.visible(cells.shape, surface.get_size(), level)
+        self.draw_blocks(surface, values, colours, area, size, level)
+        self.draw_border(surface, cells.shape)
+
+    def draw_rects(self, surface, rects, cells, colours):
+        # repaints the board inside each window rect only, rects are widened to whole cells
+        for rect in rects:
+            surface.fill((0, 0, 0), rect)
+            area, size = self.visible(cells.shape, surface.get_size(), 0, rect)
+            self.draw_blocks(surface, cells, colours, area, size, 0)
+        self.draw_border(surface, cells.shape)
+
+    def draw_border(self, surface, shape):
+        # bounding box for board when window size is different
+        size = self.cell_size()
+        rect = pygame.Rect(-self.position[0] - 1, -self.position[1] - 1, round(shape[1] * size[0]) + 2, round(shape[0] * size[1]) + 2)
+        pygame.draw.rect(surface, (255, 255, 255), rect, 1)
+
+    def mark_shown(self, cells, screen_size, version):
+        # remembers the visible cells just presented, for finding what changed by the next frame
+        self.shown_view = self.view(cells.shape, screen_size)
+        self.shown_version = version
+        if self.level():  # drawn from the pyramid, so redrawn whole whenever the cells change
+            self.shown = None
+            return
+        self.shown_area = self.visible(cells.shape, screen_size, 0)[0]
+        left, top, right, bottom = self.shown_area
+        self.shown = cells[top:bottom, left:right].copy()
+
+    def dirty_rects(self, cells, screen_size, version):
+        # window rects of the blocks of cells changed since the last presented frame, merged along each row of blocks
+        # and clipped to the window, None when the whole window should be redrawn instead
+        if self.view(cells.shape, screen_size) != self.shown_view:
+            return None
+        if version == self.shown_version:
+            return list()
+        if self.shown is None:
+            return None
+        left, top, right, bottom = self.shown_area
+        changed = cells[top:bottom, left:right] != self.shown
+        rows, columns = changed.shape
+        block_rows = ceil_div(rows, DIRTY_BLOCK)
+        block_columns = ceil_div(columns, DIRTY_BLOCK)
+        padded = numpy.zeros((block_rows * DIRTY_BLOCK, block_columns * DIRTY_BLOCK), bool)
+        padded[:rows, :columns] = changed
+        blocks = padded.reshape(block_rows, DIRTY_BLOCK, block_columns, DIRTY_BLOCK).any(axis=(1, 3))
+        if numpy.count_nonzero(blocks) > FULL_REDRAW_FRACTION * blocks.size:
+            return None
+
+        rects = list()
+        size = self.cell_size()
+        block_width = DIRTY_BLOCK * size[0]
+        block_height = DIRTY_BLOCK * size[1]
+        window = pygame.Rect((0, 0), screen_size)
+        for by in numpy.flatnonzero(blocks.any(axis=1)):
+            columns = numpy.flatnonzero(blocks[by])
+            # runs of neighbouring changed blocks become one rect
+            for run in numpy.split(columns, numpy.flatnonzero(numpy.diff(columns) > 1) + 1):
+                rect = pygame.Rect(round(left * size[0] + run[0] * block_width - self.position[0]),
+                                   round(top * size[1] + by * block_height - self.position[1]),
+                                   round(len(run) * block_width), round(block_height)).clip(window)
+                if rect:  # blocks partly off the window start above or left of it
+                    rects.append(rect)
+        if len(rects) > MAX_DIRTY_RECTS:  # many small blits cost more than one big one
+            return None
+        return rects
+
+
+class Simulation:
+    # steps the board on its own thread, so input and drawing never wait for a generation to finish
+    def __init__(self, board):
+        self.board = board
+        self.commands = queue.Queue()  # edits from the window, applied between generations
+        self.messages = queue.Queue()  # text for the window and whether the simulation paused, such as on a repeating board
+        self.saves = list()  # threads of saves still being written
+        self.paused = False
+        self.rate = None  # generations per second, None for as fast as possible
+        self.batch = 1  # generations between snapshots when as fast as possible, sized to fit FRAME_BUDGET
+        self.step_time = None  # smoothed seconds per generation
+
+        # the window draws the front snapshot while the next one is copied into the back
+        self.lock = threading.Lock()
+        self.front = self.back = None
+        self.generation = 0
+        self.populates = 0
+        self.population = 0  # populates behind the front snapshot, so the window knows when to remake its buffers
+        self.colours = None
+        self.version = 0  # counts snapshots, so the window knows when the cells have changed
+        self.mode = mode
+        self.speed = 0  # generations per second actually stepped, measured over SPEED_INTERVAL
+        self.speed_start = (time.perf_counter(), 0)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        sys.setswitchinterval(SWITCH_INTERVAL)
+        self.publish(force=True)
+        self.thread.start()
+
+    def send(self, command, *args):
+        self.commands.put((command, args))
+
+    def stop(self):
+        self.send("quit")
+        self.thread.join()
+        for thread in self.saves:  # dont cut a save short
+            thread.join()
+
+    def run(self):
+        next_step = time.perf_counter()
+        while True:
+            # wait for a command or the next generation, whichever comes first
+            timeout = None if self.paused else max(0, next_step - time.perf_counter())
+            try:
+                commands = [self.commands.get(timeout=timeout)]
+                while not self.commands.empty():
+                    commands.append(self.commands.get_nowait())
+            except queue.Empty:
+                commands = list()
+            for command, args in commands:
+                if command == "quit":
+                    return
+                self.apply(command, args)
+            if commands:
+                self.publish(force=True)
+
+            now = time.perf_counter()
+            if not self.paused and now >= next_step:
+                if self.rate is None:
+                    self.step_batch()
+                    next_step = now
+                else:
+                    self.step()
+                    next_step = max(next_step + 1 / self.rate, now - 1 / self.rate)
+                self.publish()
+
+    def apply(self, command, args):
+        global mode
+        if command == "pause":
+            self.paused = args[0]
+            self.speed_start = (time.perf_counter(), self.board.generation)  # time spent paused is not counted
+        elif command == "rate":
+            self.rate = args[0]
+        elif command == "advance":
+            self.step()
+        elif command == "flip":
+            self.board.flip_tile(args[0])
+        elif command == "populate":
+            self.board.populate(*args)
+            self.populates += 1
+        elif command == "resize":
+            self.board.update_dimensions(args[0])
+        elif command == "mode":
+            mode = args[0]
+            if STATISTICS is not None:
+                STATISTICS.add_rule_change(self.board.generation, RULES[mode])
+            self.board.cycle.reset(self.board.generation)  # earlier boards repeating means nothing under a new rule
+        elif command == "move":
+            self.board.move_window(*args)
+        elif command == "jump":
+            self.board.jump(args[0])
+        elif command == "save":
+            self.saves = [thread for thread in self.saves if thread.is_alive()]
+            self.saves.append(self.board.save(args[0], SAVE_COMPRESSED, lambda path: self.messages.put(("Saved to " + path, False))))
+        elif command == "load":
+            try:
+                self.board.load(args[0])
+            except (OSError, ValueError) as error:
+                self.messages.put(("Couldnt load {}: {}".format(args[0], error), False))
+                return
+            self.populates += 1
+            self.speed_start = (time.perf_counter(), self.board.generation)
+            self.messages.put(("Loaded generation {} from {}".format(self.board.generation, args[0]), False))
+
+    def step_batch(self):
+        # as many generations as fit in FRAME_BUDGET, going by how long recent ones took
+        start = time.perf_counter()
+        stepped = 0
+        while stepped < self.batch and not self.paused:
+            self.step()
+            stepped += 1
+        step_time = (time.perf_counter() - start) / stepped
+        self.step_time = step_time if self.step_time is None else (self.step_time + step_time) / 2
+
+        # grows at most twofold a batch, so one fast generation cant make the next batch overrun the frame
+        self.batch = max(1, min(2 * self.batch, int(FRAME_BUDGET / max(self.step_time, 1e-9))))
+
+    def step(self):
+        self.board.neighbor_check()
+        self.board.update_tiles()
+        if AUTO_PAUSE and self.board.cycle.first_repeat == self.board.generation:
+            self.paused = True
+            self.messages.put((self.board.cycle.describe() + ", paused", True))
+
+    def publish(self, force=False):
+        # copies the board into the back snapshot and swaps it to the front, unless the window is drawing the front
+        cells = self.board.get_cells()
+        if self.back is None or self.back.shape != cells.shape:
+            self.back = cells.copy()
+        else:
+            numpy.copyto(self.back, cells)
+        if self.lock.acquire(blocking=force):  # a skipped snapshot is replaced by the next generation's anyway
+            self.front, self.back = self.back, self.front
+            self.version += 1
+            self.generation = self.board.generation
+            self.population = self.populates
+            self.colours = self.board.colours
+            self.mode = mode
+            self.measure_speed()
+            self.lock.release()
+
+    def measure_speed(self):
+        now = time.perf_counter()
+        start, generation = self.speed_start
+        if self.generation < generation:  # board repopulated
+            self.speed_start = (now, self.generation)
+        elif now - start >= SPEED_INTERVAL:
+            self.speed = (self.generation - generation) / (now - start)
+            self.speed_start = (now, self.generation)
+
+
 #region definitions
 TILE_DIMS = (10, 10)  # the dimensions of each tile
 SCREEN_DIMS = (1280, 720)  # the dimensions of the screen
-board = Board(TILE_DIMS, SCREEN_DIMS)
+BOARD_DIMS = None  # columns and rows of the board, None to fit the screen (bigger boards are panned and zoomed)
+BOARD_SCREEN_DIMS = SCREEN_DIMS if BOARD_DIMS is None else (BOARD_DIMS[0] * TILE_DIMS[0], BOARD_DIMS[1] * TILE_DIMS[1])
+ENGINE = "tiles"  # "tiles" for a board of Tile objects or a key of ENGINES
+ENGINES = engines.ENGINES  # engines for EngineBoard
+if ENGINE == "jit" and ENGINE not in engines.available_engines():
+    print("numba is not installed, using the Tile board instead")
+    ENGINE = "tiles"
+if ENGINE == "tiles":
+    board = Board(TILE_DIMS, BOARD_SCREEN_DIMS)
+else:
+    board = EngineBoard(TILE_DIMS, BOARD_SCREEN_DIMS, ENGINES[ENGINE])
 FIXED_DIMS = False  # whether resising the window resizes the board (board resizes to screen when repopulated)
 
 DISPLAY_TEXT = True  # whether to display text on screen
-OUTPUT_TO_FILE = "value"  # None, "value" or "percentage" appended to population.txt when the program is run
+OUTPUT_TO_FILE = "value"  # None, "value" or "percentage" written to population.txt, or "csv" or "binary" statistics
+STATISTICS_FILES = {"value": "population.txt", "percentage": "population.txt", "csv": "population.csv", "binary": "population.bin"}
+if OUTPUT_TO_FILE:  # records are buffered and written in batches by a background thread
+    STATISTICS = statistics_writer.StatisticsWriter(STATISTICS_FILES[OUTPUT_TO_FILE], OUTPUT_TO_FILE, background=True)
+else:
+    STATISTICS = None
 
 MAX_FRAMERATE = 60  # maximum framerate the program runs at
-DEFAULT_SLOW_AMOUNT = 2  # fraction of the max framerate the program runs at
+DEFAULT_SLOW_AMOUNT = 2  # fraction of the max framerate the program runs at, 0 for as fast as possible
 slow_amount = DEFAULT_SLOW_AMOUNT
+FRAME_BUDGET = 0.014  # seconds of generations stepped between snapshots when as fast as possible
+SPEED_INTERVAL = 0.5  # seconds the generations per second readout is measured over
+SWITCH_INTERVAL = 0.0002  # seconds the simulation holds the GIL while the window waits for it, python's 0.005 stalls frames on pure python boards
 
 WRAPPING = True  # maps the screen onto a torus (left-right and top-bottom wrapping)
-RULES = [
-        [[1, 3, 5, 7], [1, 3, 5, 7],                "Replicator",         "Replication"],
-        [[1, 3, 5, 7], [0, 2, 4, 6, 8],             "Fredkin",            "Replication"],
-        [[2],          [],                          "Seeds",              "Seeder"],
-        [[2],          [0],                         "Live Free or Die",   "Seeder"],
-        [[3],          [0, 1, 2, 3, 4, 5, 6, 7, 8], "Life Without Death", "Picture"],
-        [[3],          [1, 2, 3, 4],                "Mazectric",          "Picture"],
-        [[3],          [1, 2, 3, 4, 5],             "Maze",               "Picture"],
-        [[3],          [2, 3],                      "Conway's Life",      "Life"],
-        [[3, 6],       [2, 3],                      "HighLife",           "Life"],
-        [[3, 6, 8],    [2, 4, 5],                   "Move",               "Life"],
-        [[3, 7],       [2, 3],                      "DryLife",            "Life"],
-        [[3, 8],       [2, 3],                      "Pedestrian Life",    "Life"],
-        [[3],          [1, 2],                      "Flock",              "Life"],
-        [[3, 6],       [1, 2, 5],                   "2x2",                "Life"],
-        [[3, 6, 7, 8], [3, 4, 6, 7, 8],             "Day & Night",        "Life"]
-]  # possible sets of rules coded in
+RULES = life_engine.RULES  # possible sets of rules coded in
+RULES = RULES + [rule for rule in life_engine.RANGE_RULES + life_engine.ISOTROPIC_RULES
+                 if life_engine.engine_runs_rule(ENGINES.get(ENGINE), rule)]  # larger than life and isotropic rules for engines that run them
 DEFAULT_MODE = 7  # default rule of the program
 mode = DEFAULT_MODE
 
+AUTO_PAUSE = True  # pause when the board becomes still or starts repeating
+CYCLE_HISTORY = 1024  # generations looked back over for a repeat
+
+JUMP_GENERATIONS = 1000  # generations skipped by the jump key on engine boards
+RESULT_CACHE = result_cache.ResultCache("cache")  # earlier jumps kept on disk to be reused
+
+SAVE_FILE = "save.gol"  # board saved and loaded by the save and load keys
+SAVE_COMPRESSED = True  # smaller saves, or uncompressed ones that load huge boards by memory mapping
+
+CAPTURE_DIRECTORY = "captures"  # screenshots, posters and recordings, drawn from the board rather than the screen, made on the first capture
+POSTER_SCALE = (20, 20)  # pixels per cell of posters
+RECORD_FORMAT = "apng"  # "apng" or "raw" rgb24 video frames
+RECORD_FRAME_RATE = 30  # playback frames per second of recordings, one frame per generation shown
+CAPTURE = capture.Capture()
+
 COLOUR = True  # random tile colour distribution
+DIRTY_RECTS = True  # only repaint the parts of the screen that changed since the last frame
+DIRTY_BLOCK = 8  # cells per side of the blocks changes are tracked in
+FULL_REDRAW_FRACTION = 0.3  # fraction of changed blocks above which the whole board is redrawn instead
+MAX_DIRTY_RECTS = 200  # most rects repainted separately before the whole board is redrawn instead
+DENSITY_BANDS = 8  # bands of rows the zoomed out density pyramid is remade in, one each new snapshot
+MIN_ZOOM = 1 / 1024  # smallest and biggest zoom, as multiples of TILE_DIMS
+MAX_ZOOM = 8
 SEED = "nyaaa"  # seed to generate the random starting population
 board.populate(0, seed=SEED)
 
-FONT = pygame.font.SysFont("Calibri", round(board.get_size()[1] / 20))  # font for screen text
-text_surface = None
-
 pygame.display.set_caption("The Game of Life")
-screen = pygame.display.set_mode(board.get_size(), pygame.RESIZABLE)
+screen = pygame.display.set_mode(board.get_size() if BOARD_DIMS is None else SCREEN_DIMS, pygame.RESIZABLE)
+viewport = Viewport(TILE_DIMS)  # position and zoom of the board in the window
+FONT = pygame.font.SysFont("Calibri", round(screen.get_size()[1] / 20))  # font for screen text
+text_surface = None
 clock = pygame.time.Clock()
 #endregion
 
 done = False
 pause = False
 frame = 0
+full_redraw = True  # whole screen drawn on the next frame, after the window changes
+shown_text_rects = list()  # text drawn on the last presented frame
+shown_population = None  # population last drawn
+shown_shape = None  # board size last drawn, the view is fitted to new sizes
+panning = False  # right mouse button held
+selected_mode = mode  # rule picked with the mode keys, the simulation switches to it before its next generation
+recorded_generation = None  # generation last added to a recording
+
+simulation = Simulation(board)
+if MAX_FRAMERATE is not None and slow_amount:
+    simulation.rate = MAX_FRAMERATE / slow_amount
+simulation.start()
 
 while not done:
     #region check_keys
@@ -303,81 +816,189 @@ while not done:
         if event.type == pygame.QUIT:
             done = True
         if event.type == pygame.VIDEORESIZE:
-            if FIXED_DIMS:  # allows screen to any size regardless of board
+            if FIXED_DIMS or BOARD_DIMS is not None:  # allows screen to any size regardless of board
                 screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                FONT = pygame.font.SysFont("Calibri", round(event.h / 20))
+                full_redraw = True
             else:  # locks screen size to nearest whole tile size and updates board
-                board.update_dimensions((event.w, event.h))
-                FONT = pygame.font.SysFont("Calibri", round(board.get_size()[1] / 20))
-                screen = pygame.display.set_mode(board.get_size(), pygame.RESIZABLE)
+                simulation.send("resize", (event.w, event.h))
+                screen_dims = (event.w - event.w % TILE_DIMS[0], event.h - event.h % TILE_DIMS[1])
+                FONT = pygame.font.SysFont("Calibri", round(screen_dims[1] / 20))
+                screen = pygame.display.set_mode(screen_dims, pygame.RESIZABLE)
+                full_redraw = True
 
         if event.type == pygame.KEYDOWN:
             # pause
             if event.key == pygame.K_SPACE:
                 pause = not pause
+                simulation.send("pause", pause)
                 text_surface = ScreenPrint.get_surface(("Unpaused", "Paused")[pause], "bottomright", frame)
 
             # frame advance
             if event.key == pygame.K_RETURN and pause:
-                board.neighbor_check()
-                board.update_tiles()
+                simulation.send("advance")
                 text_surface = ScreenPrint.get_surface("Frame advanced", "bottomright", frame)
 
-            # change fraction of max framerate
-            if event.key in (pygame.K_EQUALS, pygame.K_MINUS):
-                if event.unicode == "=" and slow_amount > 1.5:
+            # change generations per second as a fraction of the max framerate, past the max is as fast as possible
+            if event.key in (pygame.K_EQUALS, pygame.K_MINUS) and MAX_FRAMERATE is not None:
+                if event.unicode == "=" and slow_amount > 0.5:
                     slow_amount -= 1
                 elif event.unicode == "-" and slow_amount < MAX_FRAMERATE - 0.5:
                     slow_amount += 1
-                text_surface = ScreenPrint.get_surface("{} frames per second".format(round(MAX_FRAMERATE / slow_amount, 1)), "bottomright", frame)
+                if slow_amount:
+                    simulation.send("rate", MAX_FRAMERATE / slow_amount)
+                    text_surface = ScreenPrint.get_surface("{} generations per second".format(round(MAX_FRAMERATE / slow_amount, 1)), "bottomright", frame)
+                else:
+                    simulation.send("rate", None)
+                    text_surface = ScreenPrint.get_surface("As fast as possible", "bottomright", frame)
 
             # change mode
             if event.key in (pygame.K_PERIOD, pygame.K_COMMA):
                 if event.unicode == ".":
-                    mode += 1
+                    selected_mode += 1
                 else:
-                    mode -= 1
-                mode %= len(RULES)
-                mode_code = "b" + "".join([str(num) for num in RULES[mode][0]]) + "s" + "".join([str(num) for num in RULES[mode][1]])
-                mode_string = "{}-Type Mode: {} ({})".format(RULES[mode][3], RULES[mode][2], mode_code)
-                if OUTPUT_TO_FILE is not False:
-                    open("population.txt", "a").write("\nMode changed to " + mode_string)
-                text_surface = ScreenPrint.get_surface(mode_string, "bottomright", frame)
+                    selected_mode -= 1
+                selected_mode %= len(RULES)
+                simulation.send("mode", selected_mode)
+                text_surface = ScreenPrint.get_surface(life_engine.mode_string(RULES[selected_mode]), "bottomright", frame)
+
+            # move the window of an unbounded board
+            if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN) and ENGINE != "tiles":
+                step = max(1, board.columns // 10)
+                simulation.send("move", step * ((event.key == pygame.K_RIGHT) - (event.key == pygame.K_LEFT)),
+                                step * ((event.key == pygame.K_DOWN) - (event.key == pygame.K_UP)))
+
+            # save and load the board
+            if event.key == pygame.K_F5:
+                simulation.send("save", SAVE_FILE)
+            if event.key == pygame.K_F9:
+                simulation.send("load", SAVE_FILE)
+
+            # fit the whole board in the window
+            if event.unicode == "v" and shown_shape is not None:
+                viewport.fit(shown_shape, screen.get_size())
+
+            # capture the board as it is shown
+            if event.unicode in ("s", "p"):
+                with simulation.lock:
+                    kind, scale = ("screenshot", TILE_DIMS) if event.unicode == "s" else ("poster", POSTER_SCALE)
+                    path = os.path.join(CAPTURE_DIRECTORY, "{}_{}.png".format(kind, simulation.generation))
+                    CAPTURE.save_png(path, simulation.front, simulation.colours if COLOUR else None, scale,
+                                     lambda path: simulation.messages.put(("Saved " + path, False)))
+            if event.unicode == "r":
+                if CAPTURE.recording:
+                    CAPTURE.stop_recording(lambda path, frames: simulation.messages.put(("Recorded {} frames to {}".format(frames, path), False)))
+                    if CAPTURE.dropped:
+                        text_surface = ScreenPrint.get_surface("{} frames dropped".format(CAPTURE.dropped), "bottomright", frame)
+                else:
+                    with simulation.lock:
+                        path = os.path.join(CAPTURE_DIRECTORY, "recording_{}.{}".format(simulation.generation, ("png", "rgb")[RECORD_FORMAT == "raw"]))
+                        CAPTURE.start_recording(path, simulation.front.shape, simulation.colours if COLOUR else None,
+                                                TILE_DIMS, RECORD_FORMAT, RECORD_FRAME_RATE)
+                        recorded_generation = None
+                    text_surface = ScreenPrint.get_surface("Recording", "bottomright", frame)
+
+            # jump ahead
+            if event.unicode == "j":
+                if ENGINE == "tiles":
+                    text_surface = ScreenPrint.get_surface("Jumping needs an engine board", "bottomright", frame)
+                else:
+                    simulation.send("jump", JUMP_GENERATIONS)
+                    text_surface = ScreenPrint.get_surface("Jumping {} generations".format(JUMP_GENERATIONS), "bottomright", frame)
 
             # populate board
             key = event.unicode
             if key == "c":
-                board.populate("checkerboard")
+                simulation.send("populate", "checkerboard")
             if key == "l":
-                board.populate("lines")
+                simulation.send("populate", "lines")
             if key == "e":
-                board.populate("edges")
+                simulation.send("populate", "edges")
             if key in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]:
-                board.populate(int(key) / 10, seed=SEED)
+                simulation.send("populate", int(key) / 10, SEED)
 
         if event.type == pygame.MOUSEBUTTONDOWN:
             # flip cell on click
             if event.button == 1:
-                coords = list(pygame.mouse.get_pos())
-                board.flip_tile(coords)
+                coords = viewport.board_position(pygame.mouse.get_pos())
+                simulation.send("flip", coords)
+            # pan by dragging
+            if event.button == 3:
+                panning = True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            panning = False
+        if event.type == pygame.MOUSEMOTION and panning:
+            viewport.pan(*event.rel)
+
+        # zoom around the mouse
+        if event.type == pygame.MOUSEWHEEL and event.y:
+            viewport.zoom_by(2.0 ** event.y, pygame.mouse.get_pos())
+            text_surface = ScreenPrint.get_surface("Zoom {:g}x".format(viewport.zoom), "bottomright", frame)
     #endregion
 
-    # reduce calculations to every n frames
-    if frame % slow_amount != 0 or slow_amount == 1:
-        screen.fill((0, 0, 0))
-        board.draw(screen)
-        board.draw_tiles(screen)
-
-        if DISPLAY_TEXT:
-            text_surface = ScreenPrint.display_surface(text_surface, board, frame)
-
-        ScreenPrint.display_surface(ScreenPrint.get_surface(str(board.generation), "bottomleft", print_string=False), board)
-
+    # messages from the simulation, like pausing on a repeating board
+    while not simulation.messages.empty():
+        message, paused = simulation.messages.get()
+        pause = pause or paused
+        text_surface = ScreenPrint.get_surface(message, "bottomright", frame)
+
+    # the latest snapshot is drawn every frame however long generations take
+    with simulation.lock:
+        cells = simulation.front
+        colours = simulation.colours if COLOUR else None
+        if simulation.population != shown_population:
+            shown_population = simulation.population
+            viewport.forget_density()
+            selected_mode = simulation.mode  # loading a board can change the rule
+            if cells.shape != shown_shape:  # boards of a new size, or loaded ones, start fitted to the window
+                viewport.fit(cells.shape, screen.get_size())
+                shown_shape = cells.shape
+            full_redraw = True
+        viewport.clamp(cells.shape, screen.get_size())
+
+        if simulation.generation != recorded_generation:  # kept only while recording, but a failed capture is raised either way
+            try:
+                CAPTURE.add_frame(cells)
+            except RuntimeError as error:
+                text_surface = ScreenPrint.get_surface(str(error), "bottomright", frame)
+            recorded_generation = simulation.generation
+
+        generation_text = str(simulation.generation)
+        if not pause:  # speed actually reached, which can be below the one asked for on big boards
+            generation_text += "  {:,.0f} generations/s".format(simulation.speed)
+        generation_surface = ScreenPrint.get_surface(generation_text, "bottomleft", print_string=False)
+        text_rects = [surface["rect"] for surface in (text_surface, generation_surface) if surface is not None]
+
+        rects = viewport.dirty_rects(cells, screen.get_size(), simulation.version) if DIRTY_RECTS and not full_redraw else None
+        if rects is None:
+            viewport.draw(screen, cells, colours, simulation.version)
+        else:  # text from the last frame is painted over as well as the changed cells
+            rects += shown_text_rects + text_rects
+            viewport.draw_rects(screen, rects, cells, colours)
+        viewport.mark_shown(cells, screen.get_size(), simulation.version)
+
+    if DISPLAY_TEXT:
+        text_surface = ScreenPrint.display_surface(text_surface, board, frame)
+
+    ScreenPrint.display_surface(generation_surface, board)
+
+    if rects is None:
         pygame.display.flip()
-    if (frame % slow_amount != 0 or slow_amount == 1) and not pause:
-        board.neighbor_check()
-        board.update_tiles()
-        # cap framerate to avoid lagging
-        if MAX_FRAMERATE is not None:
-            clock.tick(MAX_FRAMERATE / slow_amount)
+    else:
+        pygame.display.update(rects)
+    shown_text_rects = text_rects
+    full_redraw = False
+
+    # cap framerate to avoid lagging
+    if MAX_FRAMERATE is not None:
+        clock.tick(MAX_FRAMERATE)
 
     frame += 1
+
+simulation.stop()
+try:
+    CAPTURE.close()  # finish writing captures and recordings
+except RuntimeError as error:
+    print(error)
+if STATISTICS is not None:
+    STATISTICS.close()  # write out whatever is still buffered
@@ -1,6 +1,9 @@
 from pygame.math import Vector2 as Vector
 import pygame
 import random
+
+import ant_engine
+
 pygame.init()
 
 
@@ -90,17 +93,24 @@ class Board:
                 tile.check_neighbors()
 
     def update_ants(self):
-        for ant in self.ants:
-            ant.update()
+        # ants are stepped by the ant engine, then only the tiles they changed are redrawn
+        if not self.ants:
+            return
+        self.ant_engine.advance(ant_steps)
+        for x, y in zip(*self.ant_engine.dirty_cells()):
+            tile = self.tiles[y][x]
+            tile.state = int(self.ant_engine.cells[y, x])
+            tile.draw()
+        self.draw_ants()
 
     def populate(self, percentage, ant_rules=[], seed=None):
 
         random.seed(seed)
 
-        self.ants = list()
+        ants = list()
         for i in range(len(ant_rules)):
-            facing = (Vector(1, 0), Vector(0, -1), Vector(-1, 0), Vector(0, 1))[random.randint(0, 3)]
-            self.ants.append(Ant(self, facing, Vector(random.randint(0, self.grid.x - 1), random.randint(0, self.grid.y - 1)), random.randint(0, 5), ant_rules[i]))
+            direction = (0, 3, 2, 1)[random.randint(0, 3)]  # right, up, left or down
+            ants.append((random.randint(0, int(self.grid.x) - 1), random.randint(0, int(self.grid.y) - 1), direction, random.randint(0, 5)))
 
         self.tiles = list()
         for row_num in range(int(self.grid.y)):
@@ -113,6 +123,12 @@ class Board:
         if seed is not None:
             random.seed(None)
 
+        self.ant_engine = ant_engine.AntEngine([[tile.state for tile in row] for row in self.tiles])
+        self.ants = list()
+        for i, (x, y, direction, colour) in enumerate(ants):
+            self.ant_engine.add_ant(x, y, direction, ant_rules[i])
+            self.ants.append(Ant(self, i, colour))
+
         self.set_tile_neighbors()
 
         self.due_draw = True
@@ -168,6 +184,8 @@ class Tile:
         self.due_rect_update = False  # done updating rect
 
     def update_state(self):
+        if self.new_state != self.state:
+            self.board.ant_engine.set_cell(int(self.pos.x), int(self.pos.y), self.new_state)
         self.state = self.new_state
         if self.due_draw:
             self.draw()
@@ -194,7 +212,7 @@ class Tile:
     def check_neighbors(self):
         live_neighbors = 0
         for neighbor in self.neighbors:
-            live_neighbors += neighbor.state
+            live_neighbors += neighbor.state > 0  # any turmite colour is alive
 
         if self.state == 0:
             if live_neighbors in RULES[mode][0]:
@@ -204,7 +222,7 @@ class Tile:
                 self.new_state = 0
         else:
             if live_neighbors in RULES[mode][1]:
-                self.new_state = 1
+                self.new_state = self.state
             else:
                 self.new_state = 0
                 self.due_draw = True
@@ -216,7 +234,10 @@ class Tile:
         within_x = self.rect_on_screen.right >= 0 and self.rect_on_screen.left <= self.board.parent.get_rect().right
         within_y = self.rect_on_screen.bottom >= 0 and self.rect_on_screen.top <= self.board.parent.get_rect().bottom
         if within_x and within_y:  # tile is only drawn to board if on screen
-            colour = (self.dead_colour, self.live_colour)[self.state]
+            if self.state > 1:  # colours past the first two only come from turmites
+                colour = TURMITE_COLOURS[(self.state - 2) % len(TURMITE_COLOURS)]
+            else:
+                colour = (self.dead_colour, self.live_colour)[self.state]
             pygame.draw.rect(self.board.surface, colour, self.rect_on_board)
 
             self.due_draw = False
@@ -225,27 +246,16 @@ class Tile:
 class Ant:
     colours = ((164, 255, 164), (255, 255, 164), (255, 164, 164), (255, 164, 255), (164, 164, 255), (164, 255, 255))
 
-    def __init__(self, board, facing, pos, colour, rules):
+    def __init__(self, board, number, colour):
         self.board = board
-        self.facing = facing
-        self.pos = pos
+        self.number = number  # position of the ant in the board's ant engine, which moves it
         self.colour = self.colours[colour]
-        self.rules = rules
 
-    def update(self):
-        tile = self.board.tiles[int(self.pos.y)][int(self.pos.x)]
-        self.facing.rotate_ip(self.rules[tile.state])
-        tile.state = 1 - tile.state
-        tile.draw()
-        self.move()
-        self.draw()
-
-    def move(self):
-        self.pos += self.facing
-        self.pos %= self.board.grid.elementwise()
+    def get_pos(self):
+        return Vector(int(self.board.ant_engine.xs[self.number]), int(self.board.ant_engine.ys[self.number]))
 
     def get_rect(self):
-        rect_top_left = v_round((self.pos + self.board.borders / 2) * self.board.tile_dims.elementwise())
+        rect_top_left = v_round((self.get_pos() + self.board.borders / 2) * self.board.tile_dims.elementwise())
         rect_dims = v_round(self.board.tile_dims)
         return pygame.Rect(rect_top_left, rect_dims)  # for drawing cells on board
 
@@ -264,6 +274,11 @@ clock = pygame.time.Clock()
 TILE_BORDERS = False
 SEED = None
 
+ANT_STEPS = 1  # steps each ant takes per frame, changed tenfold with [ and ]
+ant_steps = ANT_STEPS
+TURMITE_RULE = "RL"  # rule of the lone ant the t key starts on an empty board, letters as in ant_engine.TURN_LETTERS
+TURMITE_COLOURS = ((255, 96, 96), (96, 255, 96), (96, 96, 255), (255, 255, 96), (96, 255, 255), (255, 96, 255))  # colours 2 and up
+
 RULES = [
         [[1, 3, 5, 7], [1, 3, 5, 7],                "Replicator",         "Replication"],
         [[1, 3, 5, 7], [0, 2, 4, 6, 8],             "Fredkin",            "Replication"],
@@ -323,6 +338,15 @@ while not done:
                     mode -= 1
                 mode %= len(RULES)
 
+            if event.unicode == "t":  # one turmite, whose highways are skipped along
+                board.populate(0, [TURMITE_RULE], seed=SEED)
+
+            if event.unicode in ("[", "]"):  # change ant speed
+                if event.unicode == "]":
+                    ant_steps *= 10
+                else:
+                    ant_steps = max(1, ant_steps // 10)
+
             if event.unicode in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]:
                 ants = list()
                 if keys_pressed[pygame.K_LSHIFT]:
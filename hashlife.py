@@ -0,0 +1,394 @@
+import gc
+
+import numpy
+
+
+class Node:
+    # square of 2 ** level cells made of four quadrants, shared by every place it appears
+    __slots__ = ("nw", "ne", "sw", "se", "level", "population")
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+class HashLife:
+    # quadtree universe on an unbounded plane, advanced with memoised results
+    def __init__(self, birth=(3,), survival=(2, 3), max_nodes=2000000):
+        self.max_nodes = max_nodes  # node count that triggers garbage collection
+        self.off = Node(None, None, None, None, 0, 0)
+        self.on = Node(None, None, None, None, 0, 1)
+        self.table = dict()  # canonical node for each set of quadrants
+        self.results = dict()  # memoised (node, log2 of generations) -> centre after that many generations
+        self.blocks = dict()  # cell arrays of small nodes for drawing
+        self.empties = [self.off]
+        self.rule = None
+        self.set_rule(birth, survival)
+
+        self.generation = 0
+        self.root = self.empty(3)
+        self.x = -4  # cell coordinates of the top left of root
+        self.y = -4
+
+    def set_rule(self, birth, survival):
+        if 0 in birth:
+            raise ValueError("rules with b0 cannot run on an unbounded plane")
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+            self.birth = set(birth)
+            self.survival = set(survival)
+            self.results = dict()  # results from the old rule are wrong now
+
+    #region nodes
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self.table.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = Node(nw, ne, sw, se, nw.level + 1, population)
+            self.table[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self.empties) <= level:
+            empty = self.empties[-1]
+            self.empties.append(self.join(empty, empty, empty, empty))
+        return self.empties[level]
+
+    def centre(self, node):
+        # middle half of a node, one level down
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def expand(self, node):
+        # node placed in the middle of an empty node one level up
+        empty = self.empty(node.level - 1)
+        return self.join(self.join(empty, empty, empty, node.nw),
+                         self.join(empty, empty, node.ne, empty),
+                         self.join(empty, node.sw, empty, empty),
+                         self.join(node.se, empty, empty, empty))
+
+    def is_centred(self, node):
+        # whether every living cell is in the middle half of the node
+        inner = node.nw.se.population + node.ne.sw.population + node.sw.ne.population + node.se.nw.population
+        return inner == node.population
+    #endregion
+
+    #region stepping
+    def base_step(self, node):
+        # one generation of the middle 2x2 of a 4x4 node
+        grid = [[node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+                [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+                [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+                [node.sw.sw, node.sw.se, node.se.sw, node.se.se]]
+        new_cells = list()
+        for y in (1, 2):
+            for x in (1, 2):
+                alive_neighbors = -grid[y][x].population
+                for row in grid[y - 1:y + 2]:
+                    for cell in row[x - 1:x + 2]:
+                        alive_neighbors += cell.population
+                if grid[y][x].population:
+                    new_cells.append((self.off, self.on)[alive_neighbors in self.survival])
+                else:
+                    new_cells.append((self.off, self.on)[alive_neighbors in self.birth])
+        return self.join(*new_cells)
+
+    def successor(self, node, step_log):
+        # centre of the node after 2 ** step_log generations, where step_log <= node.level - 2
+        key = (node, step_log)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+
+        if node.population == 0:
+            result = node.nw
+        elif node.level == 2:
+            result = self.base_step(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # nine overlapping subnodes one level down
+            subnodes = (nw,
+                        self.join(nw.ne, ne.nw, nw.se, ne.sw),
+                        ne,
+                        self.join(nw.sw, nw.se, sw.nw, sw.ne),
+                        self.join(nw.se, ne.sw, sw.ne, se.nw),
+                        self.join(ne.sw, ne.se, se.nw, se.ne),
+                        sw,
+                        self.join(sw.ne, se.nw, sw.se, se.sw),
+                        se)
+
+            if step_log == node.level - 2:  # full speed, both halves advance
+                next_log = step_log - 1
+                parts = [self.successor(subnode, next_log) for subnode in subnodes]
+            else:  # only the second half advances
+                next_log = step_log
+                parts = [self.centre(subnode) for subnode in subnodes]
+
+            result = self.join(self.successor(self.join(parts[0], parts[1], parts[3], parts[4]), next_log),
+                               self.successor(self.join(parts[1], parts[2], parts[4], parts[5]), next_log),
+                               self.successor(self.join(parts[3], parts[4], parts[6], parts[7]), next_log),
+                               self.successor(self.join(parts[4], parts[5], parts[7], parts[8]), next_log))
+
+        self.results[key] = result
+        return result
+
+    def step_power(self, step_log):
+        # advances the universe 2 ** step_log generations in one call
+        while self.root.level > step_log + 3 and self.is_centred(self.root):  # crop empty border
+            self.x += 1 << (self.root.level - 2)
+            self.y += 1 << (self.root.level - 2)
+            self.root = self.centre(self.root)
+        while self.root.level < step_log + 2 or not self.is_centred(self.root):
+            self.expand_root()
+        self.expand_root()  # room for the pattern to grow into
+
+        self.x += 1 << (self.root.level - 2)
+        self.y += 1 << (self.root.level - 2)
+        self.root = self.successor(self.root, step_log)
+        self.generation += 1 << step_log
+
+        if len(self.table) > self.max_nodes:
+            self.collect_garbage()
+        # nodes never refer back up the tree, so reference counting frees them, and they are kept out of python's full
+        # collections, which would otherwise walk every node in the table while holding the GIL
+        gc.freeze()
+
+    def advance(self, generations):
+        step_log = 0
+        while generations > 0:
+            if generations & 1:
+                self.step_power(step_log)
+            generations >>= 1
+            step_log += 1
+
+    def population_at(self, generation):
+        # number of living cells at a generation, without keeping the ones in between
+        if generation < self.generation:
+            raise ValueError("universe is already at generation {}".format(self.generation))
+        self.advance(generation - self.generation)
+        return self.root.population
+
+    def expand_root(self):
+        self.x -= 1 << (self.root.level - 1)
+        self.y -= 1 << (self.root.level - 1)
+        self.root = self.expand(self.root)
+
+    def collect_garbage(self):
+        # forgets every node and result the current root does not use
+        forgotten = (self.results, self.blocks, self.table)
+        self.results = dict()
+        self.blocks = dict()
+        self.table = dict()
+        self.empties = [self.off]
+        self.keep(self.root)
+        # emptied an entry at a time, newest nodes first so each is freed on its own, rather than millions of nodes being
+        # freed in one statement the GIL cant be switched out of
+        for entries in forgotten:
+            while entries:
+                entries.popitem()
+
+    def keep(self, node):
+        if node.level == 0 or (node.nw, node.ne, node.sw, node.se) in self.table:
+            return
+        for quadrant in (node.nw, node.ne, node.sw, node.se):
+            self.keep(quadrant)
+        self.table[(node.nw, node.ne, node.sw, node.se)] = node
+    #endregion
+
+    #region cells
+    def set_cells(self, cells, x=0, y=0):
+        # replaces the universe with an array of cells whose top left is at x, y
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        level = max(3, int(max(cells.shape) - 1).bit_length())
+        square = numpy.zeros((1 << level, 1 << level), numpy.uint8)
+        square[:cells.shape[0], :cells.shape[1]] = cells
+
+        self.root = self.node_of_square(square)
+        self.x = x
+        self.y = y
+
+    def node_of_square(self, square):
+        # node holding a square array of cells 2 ** level across
+        # every 2x2 block is one of 16 level 1 nodes
+        codes = square[::2, ::2] | square[::2, 1::2] << 1 | square[1::2, ::2] << 2 | square[1::2, 1::2] << 3
+        leaves = (self.off, self.on)
+        level_one = [self.join(leaves[code & 1], leaves[code >> 1 & 1], leaves[code >> 2 & 1], leaves[code >> 3 & 1]) for code in range(16)]
+        nodes = numpy.array(level_one, dtype=object)[codes]
+
+        join = numpy.frompyfunc(self.join, 4, 1)
+        while nodes.shape[0] > 1:
+            nodes = join(nodes[::2, ::2], nodes[::2, 1::2], nodes[1::2, ::2], nodes[1::2, 1::2])
+        return nodes[0, 0]
+
+    def set_points(self, xs, ys):
+        # replaces the universe with living cells at xs, ys, only building nodes that hold some of them
+        xs = numpy.asarray(xs, numpy.int64)
+        ys = numpy.asarray(ys, numpy.int64)
+        if not len(xs):
+            self.root = self.empty(3)
+            self.x = self.y = -4
+            return
+        self.x, self.y = int(xs.min()), int(ys.min())
+        level = max(3, int(max(xs.max() - self.x, ys.max() - self.y)).bit_length())
+        self.root = self.build(xs - self.x, ys - self.y, level)
+
+    def build(self, xs, ys, level):
+        if not len(xs):
+            return self.empty(level)
+        if level == 3:
+            square = numpy.zeros((8, 8), numpy.uint8)
+            square[ys, xs] = 1
+            return self.node_of_square(square)
+        half = 1 << (level - 1)
+        east = xs >= half
+        south = ys >= half
+        return self.join(*[self.build(xs[inside] - half * x, ys[inside] - half * y, level - 1)
+                           for inside, x, y in ((~east & ~south, 0, 0), (east & ~south, 1, 0), (~east & south, 0, 1), (east & south, 1, 1))])
+
+    def get_points(self):
+        # x, y of every living cell sorted by row then column, only visiting nodes that hold some
+        xs, ys = [numpy.zeros(0, numpy.int64)], [numpy.zeros(0, numpy.int64)]
+        self.point_node(self.root, self.x, self.y, xs, ys)
+        xs, ys = numpy.concatenate(xs), numpy.concatenate(ys)
+        order = numpy.lexsort((xs, ys))
+        return xs[order], ys[order]
+
+    def point_node(self, node, x, y, xs, ys):
+        if node.population == 0:
+            return
+        if node.level <= 3:
+            block_y, block_x = numpy.nonzero(self.block(node))
+            xs.append(block_x + x)
+            ys.append(block_y + y)
+        else:
+            half = 1 << (node.level - 1)
+            self.point_node(node.nw, x, y, xs, ys)
+            self.point_node(node.ne, x + half, y, xs, ys)
+            self.point_node(node.sw, x, y + half, xs, ys)
+            self.point_node(node.se, x + half, y + half, xs, ys)
+
+    def set_cell(self, x, y, state):
+        while not (0 <= x - self.x < 1 << self.root.level and 0 <= y - self.y < 1 << self.root.level):
+            self.expand_root()
+        self.root = self.set_node_cell(self.root, x - self.x, y - self.y, state)
+
+    def set_node_cell(self, node, x, y, state):
+        if node.level == 0:
+            return (self.off, self.on)[state]
+        half = 1 << (node.level - 1)
+        quadrants = [node.nw, node.ne, node.sw, node.se]
+        i = (x >= half) + 2 * (y >= half)
+        quadrants[i] = self.set_node_cell(quadrants[i], x % half, y % half, state)
+        return self.join(*quadrants)
+
+    def get_cell(self, x, y):
+        node = self.root
+        x -= self.x
+        y -= self.y
+        if not (0 <= x < 1 << node.level and 0 <= y < 1 << node.level):
+            return 0
+        while node.level > 0:
+            half = 1 << (node.level - 1)
+            node = (node.nw, node.ne, node.sw, node.se)[(x >= half) + 2 * (y >= half)]
+            x %= half
+            y %= half
+        return node.population
+
+    def get_cells(self, x, y, columns, rows):
+        # window of the universe as an array, only visiting nodes with living cells in the window
+        cells = numpy.zeros((rows, columns), numpy.uint8)
+        self.write_node(self.root, self.x - x, self.y - y, cells)
+        return cells
+
+    def write_node(self, node, x, y, cells):
+        size = 1 << node.level
+        if node.population == 0 or x >= cells.shape[1] or y >= cells.shape[0] or x + size <= 0 or y + size <= 0:
+            return
+        if node.level <= 3:
+            block = self.block(node)
+            left, top = max(0, -x), max(0, -y)
+            right, bottom = min(size, cells.shape[1] - x), min(size, cells.shape[0] - y)
+            cells[y + top:y + bottom, x + left:x + right] = block[top:bottom, left:right]
+        else:
+            half = size >> 1
+            self.write_node(node.nw, x, y, cells)
+            self.write_node(node.ne, x + half, y, cells)
+            self.write_node(node.sw, x, y + half, cells)
+            self.write_node(node.se, x + half, y + half, cells)
+
+    def block(self, node):
+        # cell array of a small node, cached until the next garbage collection
+        block = self.blocks.get(node)
+        if block is None:
+            if node.level == 0:
+                block = numpy.full((1, 1), node.population, numpy.uint8)
+            else:
+                block = numpy.block([[self.block(node.nw), self.block(node.ne)],
+                                     [self.block(node.sw), self.block(node.se)]])
+            self.blocks[node] = block
+        return block
+    #endregion
+
+
+class HashLifeEngine:
+    # the board's window onto a hashlife universe, for showing on an EngineBoard
+    def __init__(self, cells, wrapping=False):
+        self.wrapping = False  # hashlife always runs on an unbounded plane
+        self.universe = HashLife()
+        self.x = 0  # universe coordinates of the top left of the window
+        self.y = 0
+        self.births = self.deaths = None  # steps are whole quadtree nodes, so single cell changes are never seen
+        self.set_cells(cells)
+
+    @property
+    def generation(self):
+        return self.universe.generation
+
+    @generation.setter
+    def generation(self, generation):
+        self.universe.generation = generation
+
+    @property
+    def living_cells(self):
+        return self.universe.root.population
+
+    def set_rule(self, birth, survival):
+        self.universe.set_rule(birth, survival)
+
+    def step(self):
+        self.universe.advance(1)
+
+    def advance(self, generations):
+        self.universe.advance(generations)
+
+    def flip(self, x, y):
+        # for clicking on individual cells
+        x += self.x
+        y += self.y
+        self.universe.set_cell(x, y, 1 - self.universe.get_cell(x, y))
+
+    def move_window(self, dx, dy):
+        self.x += dx
+        self.y += dy
+
+    def get_cells(self):
+        return self.universe.get_cells(self.x, self.y, self.columns, self.rows)
+
+    def set_cells(self, cells):
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        self.rows, self.columns = cells.shape
+        self.universe.set_cells(cells, self.x, self.y)
+
+    def get_plane(self):
+        # every living cell of the universe, not just the window, as x, y rows from the window's top left
+        xs, ys = self.universe.get_points()
+        return numpy.stack([xs - self.x, ys - self.y], axis=1)
+
+    def set_plane(self, points):
+        points = numpy.asarray(points, numpy.int64).reshape(-1, 2)
+        self.universe.set_points(points[:, 0] + self.x, points[:, 1] + self.y)
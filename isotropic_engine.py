@@ -0,0 +1,30 @@
+import numpy
+
+import life_engine
+
+
+def neighbourhood_indices(cells, wrapping):
+    # 9 bit index of the 3x3 block around every cell, bit y * 3 + x for the cell at x, y of the block
+    padded = life_engine.pad_cells(cells, wrapping).astype(numpy.uint16)
+    columns = cells.shape[1]
+    rows = padded[:, :columns] | padded[:, 1:columns + 1] << 1 | padded[:, 2:] << 2  # 3 bits of each row of every block
+    height = cells.shape[0]
+    return rows[:height] | rows[1:height + 1] << 3 | rows[2:] << 6
+
+
+class IsotropicEngine(life_engine.ArrayEngine):
+    # array board stepped by looking up the whole 3x3 neighbourhood of every cell in a 512 entry table,
+    # so isotropic non-totalistic rules in hensel notation cost the same as conway's life
+    def set_rule(self, birth, survival):
+        # hensel strings like "2-a" and "12", or lists of counts
+        rule = (life_engine.hensel_string(birth), life_engine.hensel_string(survival))
+        if rule != self.rule:
+            self.rule = rule
+            self.set_table(life_engine.isotropic_table(*rule))
+
+    def set_table(self, table):
+        # table[neighbourhood index] is the next state of the cell in the middle
+        self.table = numpy.asarray(table, numpy.uint8)
+
+    def next_cells(self):
+        return self.table[neighbourhood_indices(self.cells, self.wrapping)]
@@ -0,0 +1,70 @@
+import numpy
+
+import life_engine
+
+try:
+    import numba
+except ImportError:  # without numba the Tile board is used instead
+    numba = None
+
+JIT_AVAILABLE = numba is not None
+prange = numba.prange if JIT_AVAILABLE else range
+
+
+def step_kernel(cells, new, table, wrapping):
+    # neighbor count and rule lookup in one pass, rows split between threads
+    rows, columns = cells.shape
+    living_cells = 0
+    births = 0
+    for y in prange(rows):
+        for x in range(columns):
+            alive_neighbors = 0
+            for dy in (-1, 0, 1):
+                ny = y + dy
+                if ny < 0 or ny >= rows:
+                    if not wrapping:
+                        continue
+                    ny %= rows
+                for dx in (-1, 0, 1):
+                    nx = x + dx
+                    if nx < 0 or nx >= columns:
+                        if not wrapping:
+                            continue
+                        nx %= columns
+                    alive_neighbors += cells[ny, nx]
+            state = cells[y, x]
+            alive_neighbors -= state
+            new_state = table[state * 9 + alive_neighbors]
+            new[y, x] = new_state
+            living_cells += new_state
+            births += new_state > state
+    return living_cells, births
+
+
+if JIT_AVAILABLE:
+    # the window steps boards on its simulation thread, and under tbb the process then hangs at exit
+    # workqueue is built into every numba and fine while only that one thread launches kernels
+    numba.config.THREADING_LAYER = "workqueue"
+    step_kernel = numba.njit(parallel=True, cache=True)(step_kernel)
+
+
+class JitEngine(life_engine.ArrayEngine):
+    # compiled multithreaded stepping into a second buffer, so nothing is allocated per generation
+    def __init__(self, cells, wrapping=True):
+        super().__init__(cells, wrapping)
+        self.new_cells = numpy.empty_like(self.cells)
+
+    def set_cells(self, cells):
+        super().set_cells(cells)
+        self.new_cells = numpy.empty_like(self.cells)
+
+    def step(self):
+        living_cells, births = step_kernel(self.cells, self.new_cells, self.table, self.wrapping)
+        self.births = int(births)
+        self.deaths = self.living_cells + self.births - int(living_cells)
+        self.living_cells = int(living_cells)
+        self.cells, self.new_cells = self.new_cells, self.cells
+        self.generation += 1
+
+    def changed_cells(self):
+        return numpy.flatnonzero(self.cells != self.new_cells)  # the second buffer holds the generation before
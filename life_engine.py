@@ -0,0 +1,331 @@
+import functools
+import random
+import re
+
+import numpy
+
+RULES = [
+        [[1, 3, 5, 7], [1, 3, 5, 7],                "Replicator",         "Replication"],
+        [[1, 3, 5, 7], [0, 2, 4, 6, 8],             "Fredkin",            "Replication"],
+        [[2],          [],                          "Seeds",              "Seeder"],
+        [[2],          [0],                         "Live Free or Die",   "Seeder"],
+        [[3],          [0, 1, 2, 3, 4, 5, 6, 7, 8], "Life Without Death", "Picture"],
+        [[3],          [1, 2, 3, 4],                "Mazectric",          "Picture"],
+        [[3],          [1, 2, 3, 4, 5],             "Maze",               "Picture"],
+        [[3],          [2, 3],                      "Conway's Life",      "Life"],
+        [[3, 6],       [2, 3],                      "HighLife",           "Life"],
+        [[3, 6, 8],    [2, 4, 5],                   "Move",               "Life"],
+        [[3, 7],       [2, 3],                      "DryLife",            "Life"],
+        [[3, 8],       [2, 3],                      "Pedestrian Life",    "Life"],
+        [[3],          [1, 2],                      "Flock",              "Life"],
+        [[3, 6],       [1, 2, 5],                   "2x2",                "Life"],
+        [[3, 6, 7, 8], [3, 4, 6, 7, 8],             "Day & Night",        "Life"]
+]  # birth counts, survival counts, name and type of each ruleset
+
+RANGE_RULES = [
+    [[34, 45],  [34, 58],   "Bosco's Rule",     "Larger than Life", ["moore", 5, True]],
+    [[41, 81],  [41, 81],   "Majority",         "Larger than Life", ["moore", 4, True]],
+    [[75, 170], [100, 200], "Waffle",           "Larger than Life", ["moore", 7, True]],
+    [[74, 252], [163, 223], "Globe",            "Larger than Life", ["moore", 8, False]],
+    [[21, 41],  [21, 41],   "Diamond Majority", "Larger than Life", ["von neumann", 4, True]],
+    [[2, 2],    [3, 4],     "Hex Life",         "Life",             ["hexagonal", 1, False]]
+]  # birth range, survival range, name, type and neighbourhood (kind, radius, whether the cell counts itself) of each
+# Larger than Life ruleset, run by engines with set_neighbourhood
+
+ISOTROPIC_RULES = [
+    ["3",     "2-i34q", "tlife",        "Life"],
+    ["2-a",   "12",     "Just Friends", "Life"],
+    ["2i34c", "2-i3",   "Salad",        "Life"]
+]  # birth and survival in hensel notation, name and type of each isotropic non-totalistic ruleset, run by engines with set_table
+
+NEIGHBOURHOOD_CODES = {"moore": "m", "von neumann": "n", "hexagonal": "h"}  # letters of the neighbourhoods in range rule codes
+
+# hensel notation splits each neighbor count into the configurations of its live neighbors that differ by more than a turn or
+# mirroring, each with a letter, so 2e is two neighbors on adjacent edges and 2-a any two but a corner beside an edge
+# neighbourhood indices have bit y * 3 + x set for a live cell at x, y of the 3x3 block, bit 4 being the cell itself
+HENSEL_LETTERS = ["", "ce", "ceaikn", "ceaiknjqry", "ceaiknjqrytwz"]
+HENSEL_EXAMPLES = [[0], [1, 2], [5, 10, 3, 40, 33, 68], [69, 42, 11, 7, 98, 13, 14, 70, 41, 97],
+                   [325, 170, 15, 45, 99, 71, 106, 102, 43, 101, 105, 78, 108]]  # neighbourhood index of each letter's configuration
+HENSEL_LETTERS += HENSEL_LETTERS[3::-1]  # five or more neighbors are the configurations of the dead ones
+HENSEL_EXAMPLES += [[495 ^ example for example in examples] for examples in HENSEL_EXAMPLES[3::-1]]
+
+
+def rule_code(birth, survival):
+    # b/s code for a ruleset, eg b3s23 for conway's life
+    return "b" + "".join([str(num) for num in birth]) + "s" + "".join([str(num) for num in survival])
+
+
+def is_range_rule(rule):
+    return len(rule) > 4
+
+
+def is_isotropic_rule(rule):
+    return isinstance(rule[0], str)
+
+
+def range_rule_code(rule):
+    # larger than life code for an entry of RANGE_RULES, eg r5,c0,m1,s34..58,b34..45,nm for bosco's rule
+    kind, radius, middle = rule[4]
+    return "r{},c0,m{},s{}..{},b{}..{},n{}".format(radius, int(middle), rule[1][0], rule[1][1], rule[0][0], rule[0][1], NEIGHBOURHOOD_CODES[kind])
+
+
+def code_of_rule(rule):
+    # code for an entry of RULES, RANGE_RULES or ISOTROPIC_RULES, hensel strings making codes like b2-as12
+    return range_rule_code(rule) if is_range_rule(rule) else rule_code(rule[0], rule[1])
+
+
+def rule_counts(rule):
+    # birth and survival counts of any rule, range rules listing every count in their ranges and isotropic rules giving their hensel strings
+    if is_range_rule(rule):
+        return list(range(rule[0][0], rule[0][1] + 1)), list(range(rule[1][0], rule[1][1] + 1))
+    return rule[0], rule[1]
+
+
+def engine_runs_rule(engine, rule):
+    # whether an engine or engine class can run a rule, range rules needing set_neighbourhood and isotropic ones set_table
+    if is_range_rule(rule):
+        return hasattr(engine, "set_neighbourhood")
+    if is_isotropic_rule(rule):
+        return hasattr(engine, "set_table")
+    return True
+
+
+def set_engine_rule(engine, rule):
+    # engines with set_neighbourhood go back to the moore neighbourhood for rules that arent range rules
+    if not engine_runs_rule(engine, rule):
+        raise ValueError("{} cannot be run by {}".format(rule[2], type(engine).__name__))
+    if hasattr(engine, "set_neighbourhood"):
+        engine.set_neighbourhood(*(rule[4] if is_range_rule(rule) else ["moore", 1, False]))
+    engine.set_rule(*rule_counts(rule))
+
+
+def symmetries(index):
+    # a neighbourhood index turned and mirrored every way a square can be
+    cells = [divmod(bit, 3) for bit in range(9) if index >> bit & 1]
+    images = set()
+    for turn in range(4):
+        images.add(sum(1 << (y * 3 + x) for y, x in cells))
+        images.add(sum(1 << (y * 3 + 2 - x) for y, x in cells))
+        cells = [(x, 2 - y) for y, x in cells]
+    return images
+
+
+def hensel_configurations():
+    # (count, letter) of every configuration, and the position in that list of the configuration of each neighbourhood index
+    configurations = []
+    positions = numpy.zeros(512, numpy.int64)
+    for count, examples in enumerate(HENSEL_EXAMPLES):
+        for letter, example in zip(HENSEL_LETTERS[count] or [""], examples):
+            for index in symmetries(example):
+                positions[[index, index | 16]] = len(configurations)
+            configurations.append((count, letter))
+    return configurations, positions
+
+
+HENSEL_CONFIGURATIONS, HENSEL_POSITIONS = hensel_configurations()
+
+
+def hensel_string(counts):
+    # hensel strings are kept as they are, lists of counts become the string of their digits
+    return counts if isinstance(counts, str) else "".join([str(num) for num in counts])
+
+
+def hensel_conditions(text):
+    # set of (count, letter) configurations in a hensel string like 2-a3 or 2ce4
+    # a count alone is all its configurations, with letters only those, and with a minus and letters all but those
+    if re.fullmatch(r"(\d-?[a-z]*)*", text) is None:
+        raise ValueError("{} is not in hensel notation".format(text))
+    conditions = set()
+    for count, minus, letters in re.findall(r"(\d)(-?)([a-z]*)", text):
+        count = int(count)
+        if count > 8 or any(letter not in HENSEL_LETTERS[count] for letter in letters):
+            raise ValueError("{}{} is not a configuration of neighbors".format(count, letters))
+        if not letters:
+            chosen = HENSEL_LETTERS[count] or [""]
+        elif minus:
+            chosen = [letter for letter in HENSEL_LETTERS[count] if letter not in letters]
+        else:
+            chosen = letters
+        conditions.update((count, letter) for letter in chosen)
+    return conditions
+
+
+@functools.lru_cache(maxsize=None)
+def isotropic_table(birth, survival):
+    # table[neighbourhood index] is the next state of the cell in the middle, for hensel strings of birth and survival
+    # cached, so cycling back to a mode reuses its table
+    born = hensel_conditions(birth)
+    survive = hensel_conditions(survival)
+    table = numpy.zeros(512, numpy.uint8)
+    for index, position in enumerate(HENSEL_POSITIONS):
+        table[index] = HENSEL_CONFIGURATIONS[position] in (survive if index & 16 else born)
+    table.flags.writeable = False  # shared by every engine using the rule
+    return table
+
+
+def find_range_rule(code):
+    # entry of RANGE_RULES from a larger than life code, or a new one
+    match = re.fullmatch(r"r(\d+),c0,m([01]),s(\d+)\.\.(\d+),b(\d+)\.\.(\d+),n([mnh])", code)
+    if match is None:
+        raise ValueError("unknown rule {}".format(code))
+    radius, middle, survival_low, survival_high, birth_low, birth_high = (int(value) for value in match.groups()[:6])
+    kind = [kind for kind, letter in NEIGHBOURHOOD_CODES.items() if letter == match.group(7)][0]
+    rule = [[birth_low, birth_high], [survival_low, survival_high], code, "Custom", [kind, radius, bool(middle)]]
+    for known in RANGE_RULES:
+        if known[:2] == rule[:2] and known[4] == rule[4]:
+            return known
+    return rule
+
+
+def find_isotropic_rule(code):
+    # entry of ISOTROPIC_RULES from a b/s code in hensel notation, or a new one
+    birth, survival = code[1:].split("s", 1)
+    conditions = (hensel_conditions(birth), hensel_conditions(survival))
+    for known in ISOTROPIC_RULES:
+        if (hensel_conditions(known[0]), hensel_conditions(known[1])) == conditions:
+            return known
+    return [birth, survival, code, "Custom"]
+
+
+def find_rule(text):
+    # entry of RULES, RANGE_RULES or ISOTROPIC_RULES from its name or code, eg "HighLife", "b36s23", "B36/S23",
+    # "R5,C0,M1,S34..58,B34..45,NM" or "B2-a/S12"
+    for rule in RULES + RANGE_RULES + ISOTROPIC_RULES:
+        if rule[2].lower() == text.lower():
+            return rule
+    if text.lower().startswith("r"):
+        return find_range_rule(text.lower().replace(" ", ""))
+    code = text.lower().replace("/", "")
+    if re.fullmatch(r"b[\d\-a-z]*s[\d\-a-z]*", code) and re.search(r"[\-a-z]", code[1:].replace("s", "", 1)):
+        return find_isotropic_rule(code)
+    if not code.startswith("b") or "s" not in code or not code.replace("b", "").replace("s", "").isdigit():
+        raise ValueError("unknown rule {}".format(text))
+    birth = sorted(set(int(num) for num in code[1:code.index("s")]))
+    survival = sorted(set(int(num) for num in code[code.index("s") + 1:]))
+    if max(birth + survival + [0]) > 8:
+        raise ValueError("neighbor counts in {} must be 0 to 8".format(text))
+    for rule in RULES:
+        if rule[0] == birth and rule[1] == survival:
+            return rule
+    return [birth, survival, rule_code(birth, survival), "Custom"]
+
+
+def mode_string(rule):
+    # takes an entry of RULES and returns its on screen description
+    return "{}-Type Mode: {} ({})".format(rule[3], rule[2], code_of_rule(rule))
+
+
+def population_header(columns, rows, percentage, rule, seed):
+    # title line at the top of population.txt
+    dimensions_string = str(columns) + "x" + str(rows)
+    if type(percentage) in (int, float):
+        percentage_string = str(percentage * 100) + "% density"
+    else:
+        percentage_string = percentage
+    seed_string = "seed: {} {}".format(type(seed), seed)
+    return dimensions_string + " " + percentage_string + " " + mode_string(rule) + " " + seed_string
+
+
+def initial_cells(columns, rows, percentage, seed=None):
+    # the same starting board Board.populate makes for a density or pattern and seed
+    y, x = numpy.indices((rows, columns))
+    if percentage == "checkerboard":
+        cells = (x + y) % 2 == 1
+    elif percentage == "lines":
+        cells = x % 2 == 1
+    elif percentage == "edges":
+        cells = (x == 0) | (x == columns - 1) | (y == 0) | (y == rows - 1)
+    else:
+        random.seed(seed)  # one random() per tile in row order, like the Tile board
+        values = numpy.array([random.random() for i in range(rows * columns)]).reshape(rows, columns)
+        cells = values < percentage
+    return cells.astype(numpy.uint8)
+
+
+def rule_table(birth, survival):
+    # table[state * 9 + live_neighbors] is the next state of a cell
+    table = numpy.zeros(18, numpy.uint8)
+    table[list(birth)] = 1
+    table[[9 + num for num in survival]] = 1
+    return table
+
+
+def pad_cells(cells, wrapping):
+    # border of one cell around the board (or each board of a stack), copied from the opposite edge when wrapping
+    widths = [(0, 0)] * (cells.ndim - 2) + [(1, 1), (1, 1)]
+    return numpy.pad(cells, widths, mode=("constant", "wrap")[wrapping])
+
+
+def count_padded(padded):
+    # live neighbors of every cell inside a board with a one cell border
+    rows = padded.shape[-2] - 2
+    columns = padded.shape[-1] - 2
+    column_sums = padded[..., :rows, :] + padded[..., 1:rows + 1, :] + padded[..., 2:, :]
+    counts = column_sums[..., :columns] + column_sums[..., 1:columns + 1] + column_sums[..., 2:]
+    counts -= padded[..., 1:rows + 1, 1:columns + 1]  # cell isnt its own neighbor
+    return counts
+
+
+def count_neighbors(cells, wrapping):
+    return count_padded(pad_cells(cells, wrapping))
+
+
+def next_generation(cells, table, wrapping):
+    counts = count_neighbors(cells, wrapping)
+    counts += cells * numpy.uint8(9)
+    return table[counts]
+
+
+class ArrayEngine:
+    # whole board held in one array and stepped with array operations instead of Tile objects
+    def __init__(self, cells, wrapping=True):
+        self.cells = numpy.array(cells, dtype=numpy.uint8)
+        self.rows, self.columns = self.cells.shape
+        self.wrapping = wrapping
+        self.generation = 0
+        self.living_cells = int(numpy.count_nonzero(self.cells))
+        self.births = self.deaths = 0  # cells born and died in the last step
+        self.previous = self.cells
+        self.rule = None
+        self.set_rule([3], [2, 3])
+
+    def set_rule(self, birth, survival):
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:  # table only rebuilt when the mode changes
+            self.rule = rule
+            self.table = rule_table(birth, survival)
+
+    def next_cells(self):
+        return next_generation(self.cells, self.table, self.wrapping)
+
+    def step(self):
+        cells = self.next_cells()
+        self.births = int(numpy.count_nonzero(cells > self.cells))
+        living_cells = int(numpy.count_nonzero(cells))
+        self.deaths = self.living_cells + self.births - living_cells
+        self.previous = self.cells  # free to keep, each generation is a new array
+        self.cells = cells
+        self.living_cells = living_cells
+        self.generation += 1
+
+    def advance(self, generations):
+        for i in range(generations):
+            self.step()
+
+    def changed_cells(self):
+        # flat indices (y * columns + x) of the cells the last step changed
+        return numpy.flatnonzero(self.cells != self.previous)
+
+    def flip(self, x, y):
+        # for clicking on individual cells
+        self.cells[y, x] = 1 - self.cells[y, x]
+        self.living_cells += (-1, 1)[self.cells[y, x]]
+
+    def get_cells(self):
+        return self.cells
+
+    def set_cells(self, cells):
+        self.cells = numpy.array(cells, dtype=numpy.uint8)
+        self.previous = self.cells
+        self.rows, self.columns = self.cells.shape
+        self.living_cells = int(numpy.count_nonzero(self.cells))
@@ -0,0 +1,440 @@
+import functools
+
+import numpy
+
+try:
+    import numba
+except ImportError:  # without numba puzzles are solved in python, many times slower
+    numba = None
+
+KERNEL_LENGTH = 62  # longest line the compiled search holds in a 64 bit mask, with room for the fits past its end
+ONE = numpy.uint64(1)
+
+
+def reverse_bits(mask, length):
+    return int(format(mask, "0{}b".format(length))[::-1], 2) if length else 0
+
+
+def spread(seeds, allowed):
+    # seeds moved up one bit at a time through allowed bits, each bit of allowed letting a seed past it to the next
+    # adding carries every seed through its run of allowed bits at once
+    return (((seeds & allowed) + allowed) ^ allowed) | seeds
+
+
+def block_starts(size, length, filled, empty):
+    # bits s where a block of size can start, with no empty cell in it and no filled cell just after
+    free = ~empty & ((1 << length) - 1)
+    run = 1
+    while run < size:  # free runs of size cells by doubling
+        step = min(run, size - run)
+        free &= free >> step
+        run += step
+    return free & ~(filled >> size) if size else 0
+
+
+def fitted(clue, length, filled, empty):
+    # fitted[j] has bit i set if the first j blocks fit in the cells before i, covering every filled one and ending in an empty
+    # or the line's start, with the block starts each needed
+    open_cells = ~filled & ((1 << length) - 1)  # cells a fit can run on through as empty
+    fits = [spread(1, open_cells)]
+    for size in clue:
+        before = fits[-1]
+        starts = block_starts(size, length, filled, empty) & ((before & open_cells) << 1 | before & 1)
+        fits.append(spread(starts << size, open_cells) & ((1 << (length + 1)) - 1))
+    return fits
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def solve_line(clue, length, filled, empty):
+    # (filled, empty) bit masks of every cell the clue decides given the cells already known, or None if none fit
+    # cell i of a line is bit i, and every placement is covered at once by fitting the blocks from each end with bit operations
+    blocks = len(clue)
+    left = fitted(clue, length, filled, empty)
+    if not left[blocks] >> length & 1:
+        return None
+    backwards = fitted(clue[::-1], length, reverse_bits(filled, length), reverse_bits(empty, length))
+    right = [reverse_bits(backwards[blocks - j], length + 1) for j in range(blocks + 1)]  # right[j] bit i, blocks j on fit from i
+    right[blocks] |= 1 << (length + 1)  # past the end, after the last block's gap
+
+    full = (1 << length) - 1
+    open_cells = ~filled & full
+    may_empty = 0
+    for j in range(blocks + 1):
+        may_empty |= left[j] & right[j] >> 1
+    may_fill = 0
+    for j, size in enumerate(clue):
+        starts = block_starts(size, length, filled, empty) & ((left[j] & open_cells) << 1 | left[j] & 1) & right[j + 1] >> (size + 1)
+        run = 1
+        while run < size:  # cells under the blocks, by doubling
+            step = min(run, size - run)
+            starts |= starts << step
+            run += step
+        may_fill |= starts
+    return full & ~(may_empty & open_cells), full & ~may_fill
+
+
+def popcount(mask):
+    # set bits of a 64 bit mask, by adding up ever wider fields
+    mask = mask - (mask >> ONE & numpy.uint64(0x5555555555555555))
+    mask = (mask & numpy.uint64(0x3333333333333333)) + (mask >> numpy.uint64(2) & numpy.uint64(0x3333333333333333))
+    mask = (mask + (mask >> numpy.uint64(4))) & numpy.uint64(0x0F0F0F0F0F0F0F0F)
+    return numpy.int64((mask * numpy.uint64(0x0101010101010101)) >> numpy.uint64(56))
+
+
+def reverse_kernel(mask, length):
+    reversed_mask = numpy.uint64(0)
+    for bit in range(length):
+        reversed_mask = reversed_mask << ONE | mask >> numpy.uint64(bit) & ONE
+    return reversed_mask
+
+
+def block_starts_kernel(size, length, filled, empty):
+    free = ~empty & ((ONE << numpy.uint64(length)) - ONE)
+    run = 1
+    while run < size:
+        step = min(run, size - run)
+        free &= free >> numpy.uint64(step)
+        run += step
+    return free & ~(filled >> numpy.uint64(size))
+
+
+def fitted_kernel(sizes, length, filled, empty, fits):
+    open_cells = ~filled & ((ONE << numpy.uint64(length)) - ONE)
+    fits[0] = spread_kernel(ONE, open_cells)
+    for j in range(len(sizes)):
+        before = fits[j]
+        starts = block_starts_kernel(sizes[j], length, filled, empty) & ((before & open_cells) << ONE | before & ONE)
+        fits[j + 1] = spread_kernel(starts << numpy.uint64(sizes[j]), open_cells) & ((ONE << numpy.uint64(length + 1)) - ONE)
+
+
+def solve_line_kernel(sizes, length, filled, empty, left, backwards):
+    # solve_line on 64 bit masks, returning whether the clue fits and the filled and empty masks it decides
+    blocks = len(sizes)
+    fitted_kernel(sizes, length, filled, empty, left)
+    if not left[blocks] >> numpy.uint64(length) & ONE:
+        return False, filled, empty
+    fitted_kernel(sizes[::-1], length, reverse_kernel(filled, length), reverse_kernel(empty, length), backwards)
+
+    full = (ONE << numpy.uint64(length)) - ONE
+    open_cells = ~filled & full
+    may_empty = numpy.uint64(0)
+    may_fill = numpy.uint64(0)
+    for j in range(blocks + 1):
+        right = reverse_kernel(backwards[blocks - j], length + 1)
+        if j == blocks:
+            right |= ONE << numpy.uint64(length + 1)
+        may_empty |= left[j] & right >> ONE
+        if j > 0:  # block j - 1 lies between the first j - 1 fitted from the left and the rest from the right
+            size = sizes[j - 1]
+            starts = block_starts_kernel(size, length, filled, empty) & ((left[j - 1] & open_cells) << ONE | left[j - 1] & ONE)
+            starts &= right >> numpy.uint64(size + 1)
+            run = 1
+            while run < size:
+                step = min(run, size - run)
+                starts |= starts << numpy.uint64(step)
+                run += step
+            may_fill |= starts
+    return True, full & ~(may_empty & open_cells), full & ~may_fill
+
+
+def propagate_kernel(state, dirty, lines, clue_starts, clue_sizes, left, backwards, queue):
+    # Nonogram.propagate on a state of filled (state[0]) and empty (state[1]) masks of the lines then the crossings
+    # dirty marks the lines to solve and is left clear, returns False on a contradiction
+    total = len(dirty)
+    queued = 0
+    for line in range(total):
+        if dirty[line]:
+            queue[queued] = line
+            queued += 1
+    done = 0
+    while done < queued:
+        line = queue[done % total]
+        done += 1
+        dirty[line] = False
+        length = total - lines if line < lines else lines
+        fits, filled, empty = solve_line_kernel(clue_sizes[clue_starts[line]:clue_starts[line + 1]], length,
+                                                state[0, line], state[1, line], left, backwards)
+        if not fits:
+            dirty[:] = False
+            return False
+        for kind in range(2):
+            new = (filled if kind == 0 else empty) & ~state[kind, line]
+            state[kind, line] |= new
+            while new:
+                low = new & (~new + ONE)
+                new ^= low
+                k = popcount(low - ONE)
+                other, bit = (lines + k, line) if line < lines else (k, line - lines)
+                state[kind, other] |= ONE << numpy.uint64(bit)
+                if not dirty[other]:
+                    dirty[other] = True
+                    queue[queued % total] = other
+                    queued += 1
+    return True
+
+
+def guess_kernel(state, line, k, kind, lines, clue_starts, clue_sizes, dirty, left, backwards, queue, guess):
+    # Nonogram.guess into guess, returning False if it cant be completed
+    guess[:] = state
+    guess[kind, line] |= ONE << numpy.uint64(k)
+    guess[kind, lines + k] |= ONE << numpy.uint64(line)
+    dirty[line] = True
+    dirty[lines + k] = True
+    return propagate_kernel(guess, dirty, lines, clue_starts, clue_sizes, left, backwards, queue)
+
+
+def decided_kernel(state, lines):
+    decided = 0
+    for line in range(lines):
+        decided += popcount(state[0, line] | state[1, line])
+    return decided
+
+
+def probe_kernel(state, lines, clue_starts, clue_sizes, dirty, left, backwards, queue, filled, empty, best_filled, best_empty):
+    # Nonogram.probe on state, leaving the guesses to branch on in best_filled and best_empty
+    # returns 0 if the state cant be completed, 1 once every cell is decided and 2 to branch
+    crossings = len(dirty) - lines
+    full = (ONE << numpy.uint64(crossings)) - ONE
+    while True:
+        fixed = False
+        most = -1
+        for i in range(lines):
+            decided = state[0, i] | state[1, i]
+            beside = decided << ONE | decided >> ONE | ONE | ONE << numpy.uint64(crossings - 1)
+            beside |= state[0, i - 1] | state[1, i - 1] if i > 0 else full
+            beside |= state[0, i + 1] | state[1, i + 1] if i < lines - 1 else full
+            cells = beside & full & ~decided
+            while cells:
+                low = cells & (~cells + ONE)
+                cells ^= low
+                if (state[0, i] | state[1, i]) & low:  # decided by a guess kept earlier in the pass
+                    continue
+                j = popcount(low - ONE)
+                filled_fits = guess_kernel(state, i, j, 0, lines, clue_starts, clue_sizes, dirty, left, backwards, queue, filled)
+                empty_fits = guess_kernel(state, i, j, 1, lines, clue_starts, clue_sizes, dirty, left, backwards, queue, empty)
+                if not filled_fits and not empty_fits:
+                    return 0
+                if not filled_fits or not empty_fits:
+                    state[:] = filled if filled_fits else empty
+                    fixed = True
+                    continue
+                agreed = filled & empty
+                if (agreed != state).any():
+                    state[:] = agreed
+                    fixed = True
+                    continue
+                decided = min(decided_kernel(filled, lines), decided_kernel(empty, lines))
+                if decided > most:
+                    best_filled[:] = filled
+                    best_empty[:] = empty
+                    most = decided
+        if not fixed:
+            return 1 if most < 0 else 2
+
+
+def search_kernel(state, lines, clue_starts, clue_sizes, limit):
+    # Nonogram.search without recursion, the states still to search kept on a stack
+    # returns up to limit solutions as the filled masks of every line
+    total = state.shape[1]
+    dirty = numpy.ones(total, numpy.bool_)
+    left = numpy.zeros(KERNEL_LENGTH + 2, numpy.uint64)
+    backwards = numpy.zeros(KERNEL_LENGTH + 2, numpy.uint64)
+    queue = numpy.zeros(total, numpy.int64)
+    found = numpy.zeros((limit, lines), numpy.uint64)
+    count = 0
+    if not propagate_kernel(state, dirty, lines, clue_starts, clue_sizes, left, backwards, queue):
+        return found[:count]
+
+    stack = numpy.zeros((lines * (total - lines) + 2, 2, total), numpy.uint64)  # a state per decided cell at most
+    stack[0] = state
+    depth = 1
+    filled = numpy.zeros((2, total), numpy.uint64)
+    empty = numpy.zeros((2, total), numpy.uint64)
+    while depth > 0 and count < limit:
+        depth -= 1
+        state = stack[depth].copy()
+        result = probe_kernel(state, lines, clue_starts, clue_sizes, dirty, left, backwards, queue, filled, empty,
+                              stack[depth + 1], stack[depth])
+        if result == 1:
+            found[count] = state[0, :lines]
+            count += 1
+        elif result == 2:  # the filled guess on top, searched first
+            depth += 2
+    return found[:count]
+
+
+spread_kernel = spread
+if numba is not None:  # released from the gil so a window can keep drawing while a puzzle is solved
+    jit = numba.njit(cache=True, nogil=True)
+    popcount = jit(popcount)
+    reverse_kernel = jit(reverse_kernel)
+    spread_kernel = jit(spread)
+    block_starts_kernel = jit(block_starts_kernel)
+    fitted_kernel = jit(fitted_kernel)
+    solve_line_kernel = jit(solve_line_kernel)
+    propagate_kernel = jit(propagate_kernel)
+    guess_kernel = jit(guess_kernel)
+    decided_kernel = jit(decided_kernel)
+    probe_kernel = jit(probe_kernel)
+    search_kernel = jit(search_kernel)
+
+
+class Nonogram:
+    # puzzle from clues laid out like nonograms.py's, column_nums[i] describing line i of the tiles and row_nums[j]
+    # describing cell j of every line, solved by line solving until stuck then guessing a cell and solving both ways
+    # with numba, puzzles up to KERNEL_LENGTH across are searched by the compiled kernels above
+    def __init__(self, column_nums, row_nums):
+        self.lines = [tuple(nums) for nums in column_nums]
+        self.crossings = [tuple(nums) for nums in row_nums]
+        self.size = (len(self.lines), len(self.crossings))
+
+    def propagate(self, state, dirty_lines, dirty_crossings):
+        # line solves every changed line until nothing changes, returns False on a contradiction
+        filled, empty, crossing_filled, crossing_empty = state
+        while dirty_lines or dirty_crossings:
+            for i in dirty_lines:
+                result = solve_line(self.lines[i], self.size[1], filled[i], empty[i])
+                if result is None:
+                    return False
+                new_filled, new_empty = result[0] & ~filled[i], result[1] & ~empty[i]
+                filled[i] |= new_filled
+                empty[i] |= new_empty
+                for j in bit_indices(new_filled):
+                    crossing_filled[j] |= 1 << i
+                    dirty_crossings.add(j)
+                for j in bit_indices(new_empty):
+                    crossing_empty[j] |= 1 << i
+                    dirty_crossings.add(j)
+            dirty_lines = set()
+            for j in dirty_crossings:
+                result = solve_line(self.crossings[j], self.size[0], crossing_filled[j], crossing_empty[j])
+                if result is None:
+                    return False
+                new_filled, new_empty = result[0] & ~crossing_filled[j], result[1] & ~crossing_empty[j]
+                crossing_filled[j] |= new_filled
+                crossing_empty[j] |= new_empty
+                for i in bit_indices(new_filled):
+                    filled[i] |= 1 << j
+                    dirty_lines.add(i)
+                for i in bit_indices(new_empty):
+                    empty[i] |= 1 << j
+                    dirty_lines.add(i)
+            dirty_crossings = set()
+        return True
+
+    def solutions(self, limit=2):
+        # up to limit solutions as arrays shaped like the tiles, True for filled
+        lines, crossings = self.size
+        if numba is not None and 0 < lines <= KERNEL_LENGTH and 0 < crossings <= KERNEL_LENGTH:
+            return self.compiled_solutions(limit)
+        state = ([0] * lines, [0] * lines, [0] * crossings, [0] * crossings)
+        found = list()
+        if self.propagate(state, set(range(lines)), set(range(crossings))):
+            self.search(state, found, limit)
+        return found
+
+    def compiled_solutions(self, limit):
+        # the same search compiled, every line a 64 bit mask
+        lines, crossings = self.size
+        clues = self.lines + self.crossings
+        clue_starts = numpy.cumsum([0] + [len(clue) for clue in clues])
+        clue_sizes = numpy.array([size for clue in clues for size in clue], numpy.int64)
+        found = search_kernel(numpy.zeros((2, len(clues)), numpy.uint64), lines, clue_starts, clue_sizes, limit)
+        return [(masks[:, None] >> numpy.arange(crossings, dtype=numpy.uint64) & ONE).astype(bool) for masks in found]
+
+    def search(self, state, found, limit):
+        state, guesses = self.probe(state)
+        if state is None:
+            return
+        if guesses is None:
+            found.append(numpy.array([[state[0][i] >> j & 1 for j in range(self.size[1])] for i in range(self.size[0])], bool))
+            return
+        for guess in guesses:  # filled then empty
+            self.search(guess, found, limit)
+            if len(found) >= limit:
+                return
+
+    def probe(self, state):
+        # guesses each undecided cell beside a decided one both ways, keeping the other way whenever a guess cant be completed
+        # and any cell both ways decide alike
+        # returns the state and the guesses of the cell whose worse guess decides the most, None once every cell is decided,
+        # or None, None if the state cant be completed
+        while True:
+            fixed = False
+            best, most = None, -1
+            for i, j in self.frontier(state):
+                if (state[0][i] | state[1][i]) >> j & 1:  # decided by a guess kept earlier in the pass
+                    continue
+                guesses = [self.guess(state, i, j, kind) for kind in (0, 1)]
+                if guesses[0] is None and guesses[1] is None:
+                    return None, None
+                if None in guesses:
+                    state = guesses[0] or guesses[1]
+                    fixed = True
+                    continue
+                agreed = [[first & second for first, second in zip(*masks)] for masks in zip(*guesses)]  # decided either way
+                if agreed[0] != state[0] or agreed[1] != state[1]:
+                    state = tuple(agreed)
+                    fixed = True
+                    continue
+                decided = min(sum(bin(filled | empty).count("1") for filled, empty in zip(guess[0], guess[1])) for guess in guesses)
+                if decided > most:
+                    best, most = guesses, decided
+            if not fixed:
+                return state, best
+
+    def guess(self, state, i, j, kind):
+        # copy of the state with cell j of line i filled (kind 0) or empty (kind 1) and propagated, or None if it cant be completed
+        guess = tuple(list(masks) for masks in state)
+        guess[kind][i] |= 1 << j
+        guess[kind + 2][j] |= 1 << i  # the crossing's mask of the same kind
+        return guess if self.propagate(guess, {i}, {j}) else None
+
+    def frontier(self, state):
+        # undecided cells beside a decided one or the edge, where guesses most often lead somewhere
+        lines, crossings = self.size
+        full = (1 << crossings) - 1
+        decided = [filled | empty for filled, empty in zip(state[0], state[1])]
+        for i in range(lines):
+            beside = decided[i] << 1 | decided[i] >> 1 | 1 | 1 << (crossings - 1)
+            beside |= decided[i - 1] if i > 0 else full
+            beside |= decided[i + 1] if i < lines - 1 else full
+            for j in bit_indices(beside & full & ~decided[i]):
+                yield i, j
+
+    def solve(self):
+        # a solution, or None if the clues have none
+        found = self.solutions(1)
+        return found[0] if found else None
+
+    def is_unique(self):
+        return len(self.solutions(2)) == 1
+
+
+def bit_indices(mask):
+    # indices of the set bits of mask, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def clues(line):
+    # lengths of the runs of filled cells in a line, like nonograms.py's get_num_array
+    runs = list()
+    length = 0
+    for cell in line:
+        if cell:
+            length += 1
+        elif length:
+            runs.append(length)
+            length = 0
+    if length:
+        runs.append(length)
+    return runs
+
+
+def puzzle_clues(cells):
+    # column_nums and row_nums of a board of cells laid out like nonograms.py's tiles
+    cells = numpy.asarray(cells, bool)
+    return [clues(line) for line in cells], [clues(line) for line in cells.T]
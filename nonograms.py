@@ -1,6 +1,10 @@
 from pygame.math import Vector2 as Vector
 import pygame
 import random
+import threading
+
+import nonogram_solver
+
 pygame.init()
 
 
@@ -214,6 +218,14 @@ def v_round(vector):  # takes a Vector instance and returns a rounded tuple
     return (round(vector.x), round(vector.y))
 
 
+def solve_board(tiles, column_nums, row_nums, solved):  # runs on its own thread, leaving the tiles and up to two solutions in solved
+    try:
+        solutions = nonogram_solver.Nonogram(column_nums, row_nums).solutions(2)
+    except Exception as error:  # left in place of the solutions, so the window isnt left waiting for them
+        solutions = error
+    solved.append((tiles, solutions))
+
+
 DEFUAULT_SCREEN_DIMS = (1366, 768)
 screen = pygame.display.set_mode(DEFUAULT_SCREEN_DIMS, pygame.RESIZABLE)
 clock = pygame.time.Clock()
@@ -234,6 +246,8 @@ due_tile = False
 mouse_create = None
 tiles = list()
 middle_click_held = False
+solving = None  # thread solving the board
+solved = list()
 done = False
 
 while not done:
@@ -262,6 +276,10 @@ while not done:
             if event.unicode in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]:
                 board.populate(int(event.unicode) / 10, seed=SEED)
 
+            if event.key == pygame.K_s and solving is None:  # solve the board from its numbers alone, without freezing the window
+                solving = threading.Thread(target=solve_board, args=(board.tiles, board.column_nums, board.row_nums, solved), daemon=True)
+                solving.start()
+
         elif event.type == pygame.MOUSEBUTTONDOWN:  # begin dragging board
             if event.button in (1, 3):
                 mouse_state = (None, 2, None, 1)[event.button]
@@ -322,6 +340,20 @@ while not done:
                             board.due_draw = True
                         tiles.append(tile)
 
+    if solving is not None and not solving.is_alive():  # finished solving, shown unless the board has changed since
+        solving = None
+        solved_tiles, solutions = solved.pop() if solved else (None, RuntimeError("the solver stopped without a result"))
+        if isinstance(solutions, Exception):
+            print("Could not solve the board: {}".format(solutions))
+        elif solved_tiles is board.tiles:
+            if solutions:
+                for row, solved_row in zip(board.tiles, solutions[0]):
+                    for tile, filled in zip(row, solved_row):
+                        tile.state = 2 if filled else 1
+                        tile.due_draw = True
+                board.due_draw = True
+            print(("no solution", "unique solution", "more than one solution")[len(solutions)])
+
     if board.due_draw:
         screen.fill((0, 0, 0))
         board.draw()
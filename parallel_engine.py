@@ -0,0 +1,134 @@
+import atexit
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy
+
+import life_engine
+
+PARALLEL_MIN_CELLS = 1000000  # smaller boards are quicker stepped in one process
+
+
+def run_stripe(names, shape, stripe, index, wrapping, barrier, connection):
+    # worker loop stepping rows start to end of the board, reading halo rows straight from shared memory
+    memories = [shared_memory.SharedMemory(name=name) for name in names]
+    boards = [numpy.ndarray(shape, numpy.uint8, buffer=memory.buf) for memory in memories[:2]]
+    counts_out = numpy.ndarray((3, len(stripe)), numpy.int64, buffer=memories[2].buf)
+    rows, columns = shape
+    start, end = stripe[index]
+    padded = numpy.zeros((end - start + 2, columns + 2), numpy.uint8)
+
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+        current, generations, table = command
+        for i in range(generations):
+            cells = boards[current]
+            padded[1:-1, 1:-1] = cells[start:end]
+            # one row halo above and below from the neighbouring stripes
+            padded[0, 1:-1] = cells[(start - 1) % rows] if wrapping or start > 0 else 0
+            padded[-1, 1:-1] = cells[end % rows] if wrapping or end < rows else 0
+            if wrapping:
+                padded[:, 0] = padded[:, -2]
+                padded[:, -1] = padded[:, 1]
+
+            counts = life_engine.count_padded(padded)
+            counts += padded[1:-1, 1:-1] * numpy.uint8(9)
+            new = table[counts]
+            boards[1 - current][start:end] = new
+            counts_out[:, index] = numpy.count_nonzero(new), numpy.count_nonzero(new > cells[start:end]), numpy.count_nonzero(new < cells[start:end])
+
+            barrier.wait()  # nobody starts the next generation until every stripe is written
+            current = 1 - current
+        connection.send(generations)
+
+    del boards, counts_out
+    for memory in memories:
+        memory.close()
+
+
+class ParallelEngine(life_engine.ArrayEngine):
+    # board split into row stripes, each stepped by its own process over shared memory
+    def __init__(self, cells, wrapping=True, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.workers = list()
+        super().__init__(cells, wrapping)
+        self.set_cells(cells)
+
+    def set_cells(self, cells):
+        self.close()
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        self.rows, self.columns = cells.shape
+        self.living_cells = int(numpy.count_nonzero(cells))
+
+        processes = min(self.processes, self.rows)
+        # spawned workers would import the main script again, and the window opens itself at import, so without fork
+        # the board is stepped in this process too
+        if cells.size < PARALLEL_MIN_CELLS or processes < 2 or "fork" not in multiprocessing.get_all_start_methods():
+            self.cells = cells.copy()  # stepped in this process by ArrayEngine
+            self.previous = self.cells
+            return
+
+        # two boards to step between and the population, births and deaths of each stripe
+        self.memories = [shared_memory.SharedMemory(create=True, size=cells.size) for i in range(2)]
+        self.memories.append(shared_memory.SharedMemory(create=True, size=3 * 8 * processes))
+        self.boards = [numpy.ndarray(cells.shape, numpy.uint8, buffer=memory.buf) for memory in self.memories[:2]]
+        self.stripe_counts = numpy.ndarray((3, processes), numpy.int64, buffer=self.memories[2].buf)
+        self.boards[0][:] = cells
+        self.current = 0
+        self.cells = self.previous = self.boards[0]
+
+        edges = numpy.linspace(0, self.rows, processes + 1).astype(int)
+        stripes = [(int(edges[i]), int(edges[i + 1])) for i in range(processes)]
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(processes)
+        names = [memory.name for memory in self.memories]
+        for index in range(processes):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_stripe, args=(names, cells.shape, stripes, index, self.wrapping, barrier, worker_connection), daemon=True)
+            process.start()
+            self.workers.append((process, connection))
+        atexit.register(self.close)
+
+    def step(self):
+        self.advance(1)
+
+    def advance(self, generations):
+        if not self.workers:
+            for i in range(generations):
+                super().step()
+            return
+
+        for process, connection in self.workers:
+            connection.send((self.current, generations, self.table))
+        for process, connection in self.workers:
+            connection.recv()
+
+        self.current = (self.current + generations) % 2
+        self.cells = self.boards[self.current]
+        self.living_cells, self.births, self.deaths = (int(value) for value in self.stripe_counts.sum(axis=1))
+        self.generation += generations
+
+    def changed_cells(self):
+        if not self.workers:
+            return super().changed_cells()
+        return numpy.flatnonzero(self.cells != self.boards[1 - self.current])
+
+    def close(self):
+        # stops the workers and frees the shared memory
+        if not self.workers:
+            return
+        for process, connection in self.workers:
+            connection.send(None)
+        for process, connection in self.workers:
+            process.join()
+        self.workers = list()
+
+        self.cells = self.cells.copy()
+        del self.boards, self.stripe_counts
+        for memory in self.memories:
+            memory.close()
+            memory.unlink()
+        atexit.unregister(self.close)
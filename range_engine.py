@@ -0,0 +1,148 @@
+import numpy
+
+import life_engine
+
+NEIGHBOURHOODS = ("moore", "von neumann", "hexagonal")
+
+
+def neighbourhood_size(kind, radius):
+    # cells in a neighbourhood, not counting the middle
+    if kind == "moore":
+        return (2 * radius + 1) ** 2 - 1
+    if kind == "von neumann":
+        return 2 * radius * (radius + 1)
+    return 3 * radius * (radius + 1)
+
+
+def pad_by(cells, radius, wrapping):
+    # border of radius cells, copied from the opposite edge when wrapping
+    return numpy.pad(cells, radius, mode=("constant", "wrap")[wrapping]).astype(numpy.int32)
+
+
+def prefix_sums(values, axis):
+    # sums[i] along axis is the total of values before index i, so any run sums in one subtraction
+    sums = numpy.cumsum(values, axis=axis, dtype=numpy.int32)
+    shape = list(sums.shape)
+    shape[axis] = 1
+    return numpy.concatenate([numpy.zeros(shape, numpy.int32), sums], axis=axis)
+
+
+def window_sums(values, width, axis):
+    # totals of every run of width values along axis
+    sums = prefix_sums(values, axis)
+    end = sums.shape[axis]
+    return sums.take(range(width, end), axis) - sums.take(range(0, end - width), axis)
+
+
+def moore_counts(cells, radius, wrapping):
+    # live cells in the square around every cell, middle included, as two separable box sums
+    padded = pad_by(cells, radius, wrapping)
+    return window_sums(window_sums(padded, 2 * radius + 1, 0), 2 * radius + 1, 1)
+
+
+def diagonal_sums(values):
+    # sums[y, x] is the total of values up and left of y, x on its diagonal, made a row at a time so it is no bigger than values
+    height, width = values.shape
+    sums = numpy.zeros((height + 1, width + 1), numpy.int32)
+    for y in range(height):
+        numpy.add(sums[y, :-1], values[y], out=sums[y + 1, 1:])
+    return sums
+
+
+def diagonal_runs(sums, top, bottom, start, rows, columns):
+    # totals of the runs down the diagonals of diagonal_sums from row top + y, column start + x to row bottom + y, for every
+    # y below rows and x below columns
+    shift = start + bottom - top + 1
+    return sums[bottom + 1:bottom + 1 + rows, shift:shift + columns] - sums[top:top + rows, start:start + columns]
+
+
+def von_neumann_counts(cells, radius, wrapping):
+    # live cells in the diamond around every cell, middle included
+    padded = pad_by(cells, radius, wrapping)
+    rows, columns = cells.shape
+    r = radius
+
+    # runs down diagonals and antidiagonals each sum in one subtraction
+    diagonal = diagonal_sums(padded)
+    antidiagonal = diagonal_sums(padded[:, ::-1])  # of the board mirrored, so its columns run right to left
+
+    # moving a diamond one cell right adds the two edges on its right and drops the two on its left
+    # columns of the mirrored board run backwards, so its runs are flipped back to line up with the board's
+    steps = diagonal_runs(diagonal, 0, r, r + 1, rows, columns - 1)
+    steps += diagonal_runs(antidiagonal, r + 1, 2 * r, 1, rows, columns - 1)[:, ::-1]
+    steps -= diagonal_runs(antidiagonal, 0, r, r + 1, rows, columns - 1)[:, ::-1]
+    steps -= diagonal_runs(diagonal, r + 1, 2 * r, 1, rows, columns - 1)
+
+    # diamonds of the first column are added up row by row, the rest follow along each row
+    counts = numpy.zeros((rows, columns), numpy.int32)
+    for dy in range(-r, r + 1):
+        reach = r - abs(dy)
+        counts[:, 0] += padded[r + dy:r + dy + rows, r - reach:r + reach + 1].sum(axis=1, dtype=numpy.int32)
+    numpy.cumsum(steps, axis=1, dtype=numpy.int32, out=counts[:, 1:])
+    counts[:, 1:] += counts[:, :1]
+    return counts
+
+
+def hexagonal_counts(cells, radius, wrapping):
+    # live cells in the hexagon around every cell, middle included, on a board of hexes sheared into rows
+    # the hexagon holds the offsets with |dx|, |dy| and |dx - dy| up to radius, so 1 has all 8 moore neighbors but (1, -1) and (-1, 1)
+    padded = pad_by(cells, radius, wrapping)
+    rows, columns = cells.shape
+    r = radius
+
+    # runs down columns and down diagonals each sum in one subtraction
+    down = prefix_sums(padded, 0)
+    diagonal = diagonal_sums(padded)
+
+    # moving a hexagon one cell right adds a column and a diagonal on its right and drops the same on its left
+    steps = down[2 * r + 1:2 * r + 1 + rows, 2 * r + 1:2 * r + columns] - down[r:r + rows, 2 * r + 1:2 * r + columns]
+    steps += diagonal_runs(diagonal, 0, r - 1, r + 1, rows, columns - 1)
+    steps -= down[r + 1:r + 1 + rows, :columns - 1] - down[:rows, :columns - 1]
+    steps -= diagonal_runs(diagonal, r + 1, 2 * r, 1, rows, columns - 1)
+
+    # hexagons of the first column are added up row by row, the rest follow along each row
+    counts = numpy.zeros((rows, columns), numpy.int32)
+    for dy in range(-r, r + 1):
+        left, right = r + max(-r, dy - r), r + min(r, dy + r) + 1
+        counts[:, 0] += padded[r + dy:r + dy + rows, left:right].sum(axis=1, dtype=numpy.int32)
+    numpy.cumsum(steps, axis=1, dtype=numpy.int32, out=counts[:, 1:])
+    counts[:, 1:] += counts[:, :1]
+    return counts
+
+
+COUNTERS = {"moore": moore_counts, "von neumann": von_neumann_counts, "hexagonal": hexagonal_counts}
+
+
+class RangeEngine(life_engine.ArrayEngine):
+    # array board whose cells see a neighbourhood of any radius, moore, von neumann or hexagonal, for larger than life rules
+    # neighbors are counted with box sums over prefix sums, so a step costs the same whatever the radius
+    def __init__(self, cells, wrapping=True):
+        self.neighbourhood = ("moore", 1, False)
+        super().__init__(cells, wrapping)
+
+    def set_neighbourhood(self, kind, radius=1, middle=False):
+        # middle is whether a cell counts itself
+        if kind not in NEIGHBOURHOODS:
+            raise ValueError("neighbourhood must be one of {}".format(", ".join(NEIGHBOURHOODS)))
+        neighbourhood = (kind, radius, middle)
+        if neighbourhood != self.neighbourhood:
+            self.neighbourhood = neighbourhood
+            self.rule = None  # table sized for the new neighbourhood on the next set_rule
+            self.set_rule(*self.counts)
+
+    def set_rule(self, birth, survival):
+        self.counts = (list(birth), list(survival))
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+            size = neighbourhood_size(*self.neighbourhood[:2]) + 1  # counts with the middle can be one more
+            self.table = numpy.zeros((2, size + 1), numpy.uint8)  # table[state, live cells] is the next state
+            self.table[0, [num for num in birth if num <= size]] = 1
+            self.table[1, [num for num in survival if num <= size]] = 1
+
+    def next_cells(self):
+        kind, radius, middle = self.neighbourhood
+        counts = COUNTERS[kind](self.cells, radius, self.wrapping)
+        if not middle:
+            counts -= self.cells
+        return self.table[self.cells, counts]
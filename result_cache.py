@@ -0,0 +1,129 @@
+import hashlib
+import os
+import shutil
+
+import numpy
+
+import life_engine
+
+
+def run_generations(engine, generations):
+    # steps the engine, returning the living cells after each generation
+    populations = numpy.zeros(generations, numpy.int64)
+    for generation in range(generations):
+        engine.step()
+        populations[generation] = engine.living_cells
+    return populations
+
+
+def advance_generations(engine, generations):
+    # advances the engine in one go, for engines like hashlife that skip generations, only the last population is known
+    # the rest are -1
+    engine.advance(generations)
+    populations = numpy.full(generations, -1, numpy.int64)
+    if generations:
+        populations[-1] = engine.living_cells
+    return populations
+
+
+def snapshot(engine):
+    # arrays that restart the engine where it is, its cells or for unbounded engines every living cell of the plane
+    if hasattr(engine, "get_plane"):
+        return {"plane": engine.get_plane()}
+    cells = numpy.asarray(engine.get_cells(), dtype=numpy.uint8)
+    return {"cells": numpy.packbits(cells), "shape": numpy.array(cells.shape)}
+
+
+def restore(engine, arrays):
+    if "plane" in arrays:
+        engine.set_plane(arrays["plane"])
+    else:
+        rows, columns = arrays["shape"]
+        engine.set_cells(numpy.unpackbits(arrays["cells"], count=rows * columns).reshape(rows, columns))
+
+
+class ResultCache:
+    # final boards and population series on disk, keyed by a hash of everything that decides them
+    def __init__(self, directory="cache", max_bytes=500 * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(engine, rule, wrapping, columns, rows, percentage=None, seed=None, start=None):
+        # engine is the engine's name and wrapping the engine's own, as unbounded engines ignore the board's
+        # start is a snapshot of the starting board, for boards edited by hand or part way through a run
+        parts = [engine, life_engine.code_of_rule(rule), str(wrapping), str(columns), str(rows), repr(percentage), str(type(seed)), str(seed)]
+        digest = hashlib.sha256("|".join(parts).encode())
+        if start is not None:
+            for name in sorted(start):
+                digest.update(name.encode())
+                digest.update(numpy.ascontiguousarray(start[name]).tobytes())
+        return digest.hexdigest()
+
+    def entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def lookup(self, key, generations):
+        # longest cached start of a run up to generations, as (generation reached, snapshot then, populations)
+        entry = self.entry(key)
+        if not os.path.isdir(entry):
+            return 0, None, numpy.zeros(0, numpy.int64)
+        os.utime(entry)  # most recently used
+
+        populations = numpy.load(os.path.join(entry, "populations.npy"))
+        snapshots = [int(name[:-4]) for name in os.listdir(entry) if name[:-4].isdigit()]
+        snapshots = [generation for generation in snapshots if generation <= min(generations, len(populations))]
+        if not snapshots:
+            return 0, None, numpy.zeros(0, numpy.int64)
+
+        generation = max(snapshots)
+        with numpy.load(os.path.join(entry, "{}.npz".format(generation))) as arrays:
+            return generation, dict(arrays), populations[:generation]
+
+    def store(self, key, generation, arrays, populations):
+        # arrays is a snapshot of the board at generation, populations unknown as -1 are filled from earlier runs
+        entry = self.entry(key)
+        os.makedirs(entry, exist_ok=True)
+        path = os.path.join(entry, "populations.npy")
+        if os.path.exists(path):
+            known = numpy.load(path)
+            if len(known) > len(populations):
+                populations, known = known, populations
+            populations = populations.copy()
+            gaps = populations[:len(known)] < 0
+            populations[:len(known)][gaps] = known[gaps]
+        numpy.save(path, populations)
+        numpy.savez_compressed(os.path.join(entry, "{}.npz".format(generation)), **arrays)
+        self.evict()
+
+    def evict(self):
+        # removes least recently used entries until the cache fits in max_bytes
+        entries = list()
+        total = 0
+        for key in os.listdir(self.directory):
+            entry = self.entry(key)
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:  # removed by another process sharing the cache
+                continue
+            total += size
+        for used, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+def cached_run(cache, key, engine, generations, stepper=run_generations):
+    # advances the engine, starting from the longest cached prefix, and returns the populations of every generation
+    # a stepper like advance_generations leaves unknown populations as -1
+    generation, arrays, populations = cache.lookup(key, generations)
+    if arrays is not None:
+        restore(engine, arrays)
+        engine.generation += generation
+    if generation < generations:
+        populations = numpy.concatenate([populations, stepper(engine, generations - generation)])
+        cache.store(key, generations, snapshot(engine), populations)
+    return populations
@@ -0,0 +1,64 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+import numpy
+
+MAGIC = b"GOLSAVE1"
+ALIGNMENT = 64  # uncompressed cells start on this boundary so they can be memory mapped
+
+
+def save(path, cells, state, compress=True):
+    # board as one bit per cell after a json header of state (rule, generation, wrapping, colours, seed)
+    # compressed saves are small, uncompressed ones load by memory mapping the file
+    cells = numpy.asarray(cells, dtype=numpy.uint8)
+    header = dict(state, rows=cells.shape[0], columns=cells.shape[1], compression="zlib" if compress else None)
+    header = json.dumps(header).encode()
+    start = len(MAGIC) + 4 + len(header)
+    padding = -start % ALIGNMENT
+
+    packed = numpy.packbits(cells, axis=None)
+    data = zlib.compress(packed, 1) if compress else packed
+
+    # written beside the old save and swapped in, so a save cut short never loses the last one
+    with open(path + ".tmp", "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header + bytes(padding))
+        file.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def save_async(path, cells, state, compress=True, done=None):
+    # saves a copy of cells on a background thread, calling done(path) after, and returns the thread
+    cells = numpy.array(cells, dtype=numpy.uint8)
+
+    def run():
+        save(path, cells, state, compress)
+        if done is not None:
+            done(path)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def load(path):
+    # state and cells of a save, cells unpacked straight from the file's bytes
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a saved board".format(path))
+        length = struct.unpack("<I", file.read(4))[0]
+        state = json.loads(file.read(length).decode())
+        start = len(MAGIC) + 4 + length
+        start += -start % ALIGNMENT
+        size = -(-state["rows"] * state["columns"] // 8)
+
+        if state["compression"] == "zlib":
+            file.seek(start)
+            packed = numpy.frombuffer(zlib.decompress(file.read()), numpy.uint8)
+        else:
+            packed = numpy.memmap(path, numpy.uint8, "r", start, (size,))
+
+    cells = numpy.unpackbits(packed[:size], count=state["rows"] * state["columns"]).reshape(state["rows"], state["columns"])
+    return state, cells
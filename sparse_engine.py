@@ -0,0 +1,121 @@
+import numpy
+
+import life_engine
+
+SPAN = 1 << 32  # coordinates are packed into one integer as (y + BIAS) * SPAN + x + BIAS
+BIAS = 1 << 30  # planes up to a billion cells across each way
+OFFSETS = numpy.array([dy * SPAN + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy], numpy.int64)
+
+
+def pack(x, y):
+    return (numpy.asarray(y, numpy.int64) + BIAS) * SPAN + numpy.asarray(x, numpy.int64) + BIAS
+
+
+def unpack(keys):
+    return keys % SPAN - BIAS, keys // SPAN - BIAS
+
+
+class SparseEngine:
+    # unbounded plane holding only the living cells, the board is a window onto it
+    def __init__(self, cells, wrapping=False):
+        self.wrapping = False  # the plane has no edges to wrap
+        self.generation = 0
+        self.x = 0  # plane coordinates of the top left of the window
+        self.y = 0
+        self.births = self.deaths = 0  # cells born and died in the last step
+        self.rule = None
+        self.set_cells(cells)
+        self.set_rule([3], [2, 3])
+
+    def set_rule(self, birth, survival):
+        if 0 in birth:
+            raise ValueError("rules with b0 cannot run on an unbounded plane")
+        rule = (tuple(birth), tuple(survival))
+        if rule != self.rule:
+            self.rule = rule
+            self.table = life_engine.rule_table(birth, survival).astype(bool)
+
+    @property
+    def living_cells(self):
+        return len(self.keys)
+
+    def set_cells(self, cells):
+        cells = numpy.asarray(cells, dtype=numpy.uint8)
+        self.rows, self.columns = cells.shape
+        y, x = numpy.nonzero(cells)
+        self.keys = numpy.sort(pack(x + self.x, y + self.y))
+        self.previous_keys = self.keys
+        self.update_bounds()
+
+    def get_plane(self):
+        # every living cell of the plane, not just the window, as x, y rows from the window's top left
+        x, y = unpack(self.keys)
+        return numpy.stack([x - self.x, y - self.y], axis=1)
+
+    def set_plane(self, points):
+        points = numpy.asarray(points, numpy.int64).reshape(-1, 2)
+        self.keys = numpy.sort(pack(points[:, 0] + self.x, points[:, 1] + self.y))
+        self.previous_keys = self.keys
+        self.update_bounds()
+
+    def update_bounds(self):
+        # smallest box holding every living cell, as left, top, right, bottom
+        if len(self.keys):
+            x, y = unpack(self.keys)
+            self.bounds = (int(x.min()), int(y[0]), int(x.max()), int(y[-1]))
+        else:
+            self.bounds = None
+
+    def step(self):
+        # only cells with a living neighbor can be born, so the work scales with the population
+        neighbors, counts = numpy.unique((self.keys[:, None] + OFFSETS).reshape(-1), return_counts=True)
+        alive = self.contains(neighbors)
+        living = self.table[alive * 9 + counts]
+        new_keys = neighbors[living]
+        self.births = int(numpy.count_nonzero(living > alive))
+
+        if 0 in self.rule[1]:  # cells with no neighbors at all can survive too
+            isolated = self.keys[~numpy.isin(self.keys, neighbors, assume_unique=True)]
+            new_keys = numpy.union1d(new_keys, isolated)
+
+        self.deaths = len(self.keys) + self.births - len(new_keys)
+        self.previous_keys = self.keys
+        self.keys = new_keys
+        self.update_bounds()
+        self.generation += 1
+
+    def changed_cells(self):
+        # packed plane coordinates of the cells the last step changed, as the plane has no flat index
+        return numpy.setxor1d(self.previous_keys, self.keys, assume_unique=True)
+
+    def advance(self, generations):
+        for i in range(generations):
+            self.step()
+
+    def contains(self, keys):
+        index = numpy.searchsorted(self.keys, keys)
+        return self.keys[numpy.minimum(index, len(self.keys) - 1)] == keys if len(self.keys) else numpy.zeros(len(keys), bool)
+
+    def flip(self, x, y):
+        # for clicking on individual cells in the window
+        key = pack(x + self.x, y + self.y)
+        index = numpy.searchsorted(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            self.keys = numpy.delete(self.keys, index)
+        else:
+            self.keys = numpy.insert(self.keys, index, key)
+        self.update_bounds()
+
+    def move_window(self, dx, dy):
+        self.x += dx
+        self.y += dy
+
+    def get_cells(self):
+        # cells inside the window, found from the sorted keys without scanning the whole plane
+        cells = numpy.zeros((self.rows, self.columns), numpy.uint8)
+        start, end = numpy.searchsorted(self.keys, [pack(-BIAS, self.y), pack(-BIAS, self.y + self.rows)])
+        x, y = unpack(self.keys[start:end])
+        x -= self.x
+        inside = (x >= 0) & (x < self.columns)
+        cells[y[inside] - self.y, x[inside]] = 1
+        return cells
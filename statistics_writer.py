@@ -0,0 +1,146 @@
+import queue
+import struct
+import threading
+
+import life_engine
+
+FORMATS = ("value", "percentage", "csv", "binary")  # value and percentage are the old population.txt layouts
+CSV_COLUMNS = "kind,generation,living_cells,births,deaths,note"
+BINARY_MAGIC = b"GOLSTATS"
+BINARY_RECORD = struct.Struct("<Bqqqq")  # kind, generation, then living cells, births, deaths or the rule's masks
+GENERATION_RECORD = 0
+RULE_RECORD = 1
+
+
+def rule_masks(rule):
+    # birth and survival counts of a rule as 9 bit masks, for binary records
+    # range rules give their ranges as low << 32 | high instead, and their neighbourhood as radius << 8 | kind << 1 | middle
+    # isotropic rules give masks of their configurations, bit i for life_engine.HENSEL_CONFIGURATIONS[i], and -1
+    if life_engine.is_isotropic_rule(rule):
+        masks = [sum(1 << life_engine.HENSEL_CONFIGURATIONS.index(condition) for condition in life_engine.hensel_conditions(text))
+                 for text in rule[:2]]
+        return masks[0], masks[1], -1
+    if life_engine.is_range_rule(rule):
+        kind, radius, middle = rule[4]
+        neighbourhood = radius << 8 | list(life_engine.NEIGHBOURHOOD_CODES).index(kind) << 1 | middle
+        return rule[0][0] << 32 | rule[0][1], rule[1][0] << 32 | rule[1][1], neighbourhood
+    return sum(1 << num for num in rule[0]), sum(1 << num for num in rule[1]), 0
+
+
+class StatisticsWriter:
+    # per generation statistics kept in memory and written out in batches instead of one append per frame
+    def __init__(self, path, file_format="value", batch_size=1000, background=False):
+        if file_format not in FORMATS:
+            raise ValueError("file format must be one of {}".format(", ".join(FORMATS)))
+        self.path = path
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.records = list()
+        self.cells = 1
+        self.file = None
+
+        # a background thread does the writing so the frame never waits on the disk
+        self.queue = None
+        if background:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self.write_batches, daemon=True)
+            self.thread.start()
+
+    def start(self, header, cells):
+        # empties the file and writes its title, for a newly populated board of cells tiles
+        self.flush()
+        self.submit(("start", header, cells))
+
+    def add_generation(self, generation, living_cells, births=None, deaths=None):
+        self.records.append((GENERATION_RECORD, generation, living_cells, births, deaths))
+        if len(self.records) >= self.batch_size:
+            self.flush()
+
+    def add_rule_change(self, generation, rule):
+        self.records.append((RULE_RECORD, generation, rule))
+        self.flush()  # rare, and worth having on disk straight away
+
+    def flush(self):
+        if self.records:
+            self.submit(("records", self.records))
+            self.records = list()
+
+    def close(self):
+        self.flush()
+        if self.queue is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.queue = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def submit(self, batch):
+        if self.queue is None:
+            self.write(batch)
+        else:
+            self.queue.put(batch)
+
+    def write_batches(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            self.write(batch)
+
+    def write(self, batch):
+        if batch[0] == "start":
+            if self.file is not None:
+                self.file.close()
+            self.cells = batch[2]
+            if self.file_format == "binary":
+                self.file = open(self.path, "wb")
+                header = batch[1].encode()
+                self.file.write(BINARY_MAGIC + struct.pack("<I", len(header)) + header)
+            else:
+                self.file = open(self.path, "w")
+                if self.file_format == "csv":
+                    self.file.write(CSV_COLUMNS + "\nstart,0,,,,\"" + batch[1].replace("\"", "\"\"") + "\"")
+                else:
+                    self.file.write(batch[1])
+        elif self.file is not None:
+            self.file.write(self.encode(batch[1]))
+        if self.file is not None:
+            self.file.flush()
+
+    def encode(self, records):
+        if self.file_format == "binary":
+            data = bytearray()
+            for record in records:
+                if record[0] == GENERATION_RECORD:
+                    births, deaths = (-1 if value is None else value for value in record[3:5])
+                    data += BINARY_RECORD.pack(GENERATION_RECORD, record[1], record[2], births, deaths)
+                else:
+                    data += BINARY_RECORD.pack(RULE_RECORD, record[1], *rule_masks(record[2]))
+            return bytes(data)
+
+        lines = list()
+        for record in records:
+            if record[0] == RULE_RECORD:
+                if self.file_format == "csv":
+                    lines.append("\nrule,{},,,,{}".format(record[1], life_engine.code_of_rule(record[2])))
+                else:
+                    lines.append("\nMode changed to " + life_engine.mode_string(record[2]))
+            elif self.file_format == "csv":
+                births, deaths = ("" if value is None else value for value in record[3:5])
+                lines.append("\ngeneration,{},{},{},{},".format(record[1], record[2], births, deaths))
+            elif self.file_format == "percentage":
+                lines.append("\n" + str(round(100 * record[2] / self.cells, 2)))
+            else:
+                lines.append("\n" + str(record[2]))
+        return "".join(lines)
+
+
+def read_binary(path):
+    # header and records of a binary statistics file, records as (kind, generation, a, b, c) tuples
+    with open(path, "rb") as file:
+        if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError("{} is not a binary statistics file".format(path))
+        length = struct.unpack("<I", file.read(4))[0]
+        header = file.read(length).decode()
+        return header, list(BINARY_RECORD.iter_unpack(file.read()))
@@ -0,0 +1,120 @@
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import os
+import sys
+
+import batch_runner
+import engines
+import life_engine
+import result_cache
+
+FIELDS = ["rule", "density", "seed", "columns", "rows", "generations", "final_population", "min_population", "max_population", "mean_population", "populations"]
+KEY_FIELDS = FIELDS[:6]  # fields that identify a job when resuming
+
+
+def make_jobs(rules, densities, seeds, sizes, generations):
+    # every combination of the sweep parameters, one job each
+    for rule, density, seed, size in itertools.product(rules, densities, seeds, sizes):
+        yield {"rule": rule, "density": density, "seed": seed, "columns": size[0], "rows": size[1], "generations": generations}
+
+
+def job_key(job):
+    return tuple(str(job[field]) for field in KEY_FIELDS)
+
+
+def completed_keys(path):
+    # keys of jobs already in the output file, so an interrupted sweep can carry on
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as file:
+        return set(job_key(row) for row in csv.DictReader(file))
+
+
+def run_job(job, engine, wrapping, cache_directory=None):
+    rule = life_engine.find_rule(job["rule"])
+    cache = result_cache.ResultCache(cache_directory) if cache_directory else None
+    populations = batch_runner.run(job["columns"], job["rows"], rule, job["density"], job["seed"], job["generations"], engine, wrapping, cache=cache)
+    row = dict(job)
+    row["final_population"] = int(populations[-1]) if len(populations) else 0
+    row["min_population"] = int(populations.min()) if len(populations) else 0
+    row["max_population"] = int(populations.max()) if len(populations) else 0
+    row["mean_population"] = round(float(populations.mean()), 2) if len(populations) else 0
+    row["populations"] = " ".join(str(value) for value in populations)
+    return row
+
+
+def sweep(jobs, output, engine="bitboard", wrapping=True, processes=None, cache_directory=None):
+    # runs jobs across a process pool, streaming each result into one csv file as it finishes
+    processes = processes or os.cpu_count() or 1
+    done = completed_keys(output)
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+
+    with open(output, "a", newline="") as file, concurrent.futures.ProcessPoolExecutor(processes) as pool:
+        writer = csv.DictWriter(file, FIELDS)
+        if new_file:
+            writer.writeheader()
+
+        pending = set()
+        finished = skipped = 0
+        for job in jobs:
+            if job_key(job) in done:
+                skipped += 1
+                continue
+            # only a few jobs are queued at once so memory stays flat however many there are
+            if len(pending) >= 2 * processes:
+                completed, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                finished += write_results(writer, file, completed)
+            pending.add(pool.submit(run_job, job, engine, wrapping, cache_directory))
+
+        completed, pending = concurrent.futures.wait(pending)
+        finished += write_results(writer, file, completed)
+
+    sys.stderr.write("{} jobs run, {} already done\n".format(finished, skipped))
+
+
+def write_results(writer, file, futures):
+    for future in futures:
+        writer.writerow(future.result())
+    file.flush()
+    return len(futures)
+
+
+def parse_densities(text):
+    # "0.1,0.3" or a range "0:0.9:0.1"
+    if ":" in text:
+        start, stop, step = (float(value) for value in text.split(":"))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(count)]
+    return [float(value) for value in text.split(",")]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Run every combination of rules, densities, seeds and sizes and collect their populations.")
+    parser.add_argument("--rules", nargs="+", default=[rule[2] for rule in life_engine.RULES], help="names or b/s codes (default every rule in RULES)")
+    parser.add_argument("--densities", type=parse_densities, default=parse_densities("0:0.9:0.1"), help="list like 0.1,0.3 or range like 0:0.9:0.1")
+    parser.add_argument("--seeds", nargs="+", default=["nyaaa"])
+    parser.add_argument("--sizes", nargs="+", type=batch_runner.parse_size, default=[(128, 72)], help="sizes as COLUMNSxROWS")
+    parser.add_argument("--generations", type=int, default=1000)
+    parser.add_argument("--engine", choices=engines.available_engines(), default="bitboard")
+    parser.add_argument("--no-wrapping", dest="wrapping", action="store_false")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default one per core)")
+    parser.add_argument("--cache", default=None, help="directory of cached results shared by the workers")
+    parser.add_argument("--output", default="sweep.csv", help="csv file results are added to, existing jobs in it are skipped")
+    args = parser.parse_args(args)
+
+    for rule in args.rules:
+        try:
+            rule = life_engine.find_rule(rule)
+        except ValueError as error:
+            parser.error(str(error))
+        if not life_engine.engine_runs_rule(engines.ENGINES[args.engine], rule):
+            parser.error("the {} engine cannot run {}".format(args.engine, rule[2]))
+
+    jobs = make_jobs(args.rules, args.densities, args.seeds, args.sizes, args.generations)
+    sweep(jobs, args.output, args.engine, args.wrapping, args.processes, args.cache)
+
+
+if __name__ == "__main__":
+    main()